@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from dbapp.models import Passenger, Worker, blind_index
+
+class Command(BaseCommand):
+    help = 'Пересчёт индексов для поиска по зашифрованным полям (паспорт, телефон)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+            help='Количество записей, обновляемых за один запрос')
+
+    def rebuild(self, model, field: str, hash_field: str, batch_size: int) -> int:
+        updated = 0
+        batch = []
+        for instance in model.objects.only('pk', field, hash_field).iterator(chunk_size=batch_size):
+            value = blind_index(getattr(instance, field))
+            if getattr(instance, hash_field) == value:
+                continue
+            setattr(instance, hash_field, value)
+            batch.append(instance)
+
+            if len(batch) >= batch_size:
+                with transaction.atomic():
+                    model.objects.bulk_update(batch, [hash_field])
+                updated += len(batch)
+                batch = []
+
+        if batch:
+            with transaction.atomic():
+                model.objects.bulk_update(batch, [hash_field])
+            updated += len(batch)
+        return updated
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+
+        passengers = self.rebuild(Passenger, 'passport', 'passport_hash', batch_size)
+        self.stdout.write(self.style.SUCCESS(f'Обновлено индексов паспортов: {passengers}'))
+
+        workers = self.rebuild(Worker, 'phone', 'phone_hash', batch_size)
+        self.stdout.write(self.style.SUCCESS(f'Обновлено индексов телефонов: {workers}'))
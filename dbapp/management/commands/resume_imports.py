@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from dbapp.models import ImportJob
+from webapp.import_jobs import run_import_job
+
+class Command(BaseCommand):
+    help = ('Продолжение импортов, прерванных остановкой сервера, с последней сохранённой строки. '
+            'Запускать после перезапуска, когда фоновые задачи импорта больше не выполняются')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--job', type=int, action='append',
+            help='Номер задачи импорта (можно указать несколько раз); по умолчанию - все незавершённые')
+
+    def handle(self, *args, **options):
+        if options['job']:
+            jobs = ImportJob.objects.filter(pk__in=options['job']).exclude(status='success')
+        else:
+            jobs = ImportJob.objects.filter(status__in=['pending', 'running'])
+
+        for job in jobs.order_by('pk'):
+            self.stdout.write(f'Импорт #{job.pk} ({job.kind}): продолжение со строки {job.rows_done + 2}')
+            run_import_job(job.pk)
+
+            job.refresh_from_db()
+            if job.status == 'success':
+                self.stdout.write(self.style.SUCCESS(
+                    f'Импорт #{job.pk}: импортировано {job.imported}, ошибок {job.error_count}'
+                ))
+            else:
+                self.stdout.write(self.style.ERROR(f'Ошибка импорта #{job.pk}: {job.message}'))
@@ -0,0 +1,106 @@
+import hashlib
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import BinaryField, ExpressionWrapper, F
+from django.utils import timezone
+from django.utils.encoding import force_bytes
+
+from dbapp.models import KeyRotationCheckpoint, Passenger, Worker
+from dbapp.rotation import init_worker, rotate_tokens
+
+ROTATED_FIELDS = [(Passenger, 'passport'), (Worker, 'phone')]
+
+def _split(items: list, parts: int) -> list[list]:
+    size = -(-len(items) // parts)
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+class Command(BaseCommand):
+    help = ('Перешифровка паспортов пассажиров и телефонов сотрудников первым ключом из FERNET_KEYS. '
+            'Остальные ключи можно удалить из настроек после завершения команды')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=2000,
+            help='Количество записей, обрабатываемых за одну транзакцию')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+            help='Количество процессов для шифрования')
+        parser.add_argument('--sleep', type=float, default=0.1,
+            help='Пауза между транзакциями (сек.), чтобы не нагружать базу данных')
+        parser.add_argument('--restart', action='store_true',
+            help='Начать заново, игнорируя сохранённые контрольные точки')
+
+    def write_chunk(self, model, name: str, rows: list[tuple[int, bytes, bytes]]) -> list[int]:
+        """Writes the (pk, old token, new token) rows; returns the pks that no longer held the old token."""
+        # EncryptedField.get_db_prep_save would encrypt the new tokens a second
+        # time (it does so even for expressions), so they are written as raw bytes.
+        # Comparing the old token keeps a row edited meanwhile from being reverted
+        quote = connection.ops.quote_name
+        column = quote(model._meta.get_field(name).column)
+        sql = 'UPDATE {} SET {} = %s WHERE {} = %s AND {} = %s'.format(
+            quote(model._meta.db_table), column, quote(model._meta.pk.column), column,
+        )
+        binary = connection.Database.Binary
+
+        stale = []
+        with connection.cursor() as cursor:
+            for pk, old, new in rows:
+                cursor.execute(sql, [binary(new), pk, binary(old)])
+                if cursor.rowcount == 0:
+                    stale.append(pk)
+        return stale
+
+    def rotate_rows(self, pool: ProcessPoolExecutor, rows: list[tuple[int, bytes]], workers: int) -> list[tuple[int, bytes, bytes]]:
+        old = [bytes(token) for _, token in rows]
+        new = [token for chunk in pool.map(rotate_tokens, _split(old, workers)) for token in chunk]
+        return [(pk, old_token, new_token) for (pk, _), old_token, new_token in zip(rows, old, new)]
+
+    def rotate(self, pool: ProcessPoolExecutor, model, name: str, checkpoint: KeyRotationCheckpoint, options: dict):
+        ciphertext = ExpressionWrapper(F(name), output_field=BinaryField())
+        tokens = model.objects.filter(**{f'{name}__isnull': False}).annotate(ciphertext=ciphertext).order_by('pk')
+
+        while True:
+            rows = list(tokens.filter(pk__gt=checkpoint.last_pk).values_list('pk', 'ciphertext')[:options['chunk_size']])
+            if not rows:
+                break
+
+            with transaction.atomic():
+                pending = rows
+                while pending:
+                    stale = self.write_chunk(model, name, self.rotate_rows(pool, pending, options['workers']))
+                    pending = list(tokens.filter(pk__in=stale).values_list('pk', 'ciphertext')) if stale else []
+
+                checkpoint.last_pk = rows[-1][0]
+                checkpoint.rotated += len(rows)
+                checkpoint.save(update_fields=['last_pk', 'rotated', 'updated_at'])
+
+            self.stdout.write(f'{checkpoint.field}: {checkpoint.rotated} (pk <= {checkpoint.last_pk})')
+            time.sleep(options['sleep'])
+
+        checkpoint.finished_at = timezone.now()
+        checkpoint.save(update_fields=['finished_at', 'updated_at'])
+
+    def handle(self, *args, **options):
+        for model, name in ROTATED_FIELDS:
+            field = model._meta.get_field(name)
+            label = f'{model._meta.label_lower}.{name}'
+            keys = [force_bytes(key) for key in field.fernet_keys]
+            key_id = hashlib.sha256(b'fernet-key-id:' + keys[0]).hexdigest()
+
+            checkpoint, _ = KeyRotationCheckpoint.objects.get_or_create(field=label, key_id=key_id)
+            if options['restart']:
+                checkpoint.last_pk, checkpoint.rotated, checkpoint.finished_at = 0, 0, None
+                checkpoint.save()
+            elif checkpoint.finished_at:
+                self.stdout.write(f'{label}: уже перешифровано текущим ключом')
+                continue
+
+            try:
+                with ProcessPoolExecutor(options['workers'], initializer=init_worker, initargs=(keys,)) as pool:
+                    self.rotate(pool, model, name, checkpoint, options)
+                self.stdout.write(self.style.SUCCESS(f'{label}: перешифровано записей {checkpoint.rotated}'))
+            except Exception as e:
+                self.stdout.write(self.style.ERROR(f'Ошибка перешифровки {label}: {str(e)}'))
+                raise
@@ -0,0 +1,99 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:09
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def fill_board(apps, schema_editor):
+    Flight = apps.get_model('dbapp', 'Flight')
+    BoardFlight = apps.get_model('dbapp', 'BoardFlight')
+    FlightTime = apps.get_model('dbapp', 'FlightTime')
+    GateFlight = apps.get_model('dbapp', 'GateFlight')
+    CheckInDeskFlight = apps.get_model('dbapp', 'CheckInDeskFlight')
+
+    flight_times = {ft.pk: ft for ft in FlightTime.objects.all()}
+    gates, desks = {}, {}
+    for flight_id, number in GateFlight.objects.values_list('flight_id', 'gate__number'):
+        gates.setdefault(flight_id, []).append(number)
+    for flight_id, number in CheckInDeskFlight.objects.values_list('flight_id', 'desk__number'):
+        desks.setdefault(flight_id, []).append(number)
+
+    rows = []
+    flights = Flight.objects.select_related(
+        'airplane__airline', 'departure_airport', 'arrival_airport', 'flight_status'
+    )
+    for flight in flights.iterator():
+        flight_time = flight_times.get(flight.pk)
+        airline_code = flight.airplane.airline.IATA_code
+        rows.append(BoardFlight(
+            flight=flight,
+            code=f'{airline_code} {flight.number}',
+            number=flight.number,
+            airline_code=airline_code,
+            airplane_name=flight.airplane.name,
+            tail_number=flight.airplane.tail_number,
+            departure_airport_id=flight.departure_airport.pk,
+            departure_iata=flight.departure_airport.IATA_code,
+            departure_name=flight.departure_airport.name,
+            arrival_airport_id=flight.arrival_airport.pk,
+            arrival_iata=flight.arrival_airport.IATA_code,
+            arrival_name=flight.arrival_airport.name,
+            planned_departure=flight.planned_departure,
+            planned_arrival=flight.planned_arrival,
+            board_time=(
+                flight.planned_departure or flight.planned_arrival
+                if flight.departure_airport_id == settings.HOME_AIRPORT_ID
+                else flight.planned_arrival or flight.planned_departure
+            ),
+            actual_departure=flight_time.actual_departure if flight_time else None,
+            actual_arrival=flight_time.actual_arrival if flight_time else None,
+            status_id=flight.flight_status.pk,
+            status_name=flight.flight_status.name,
+            gates=', '.join(gates.get(flight.pk, [])),
+            desks=', '.join(desks.get(flight.pk, [])),
+        ))
+    BoardFlight.objects.bulk_create(rows, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dbapp', '0006_alter_passenger_middle_name'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BoardFlight',
+            fields=[
+                ('flight', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, serialize=False, to='dbapp.flight', verbose_name='Рейс')),
+                ('code', models.CharField(max_length=20, verbose_name='Код рейса')),
+                ('number', models.IntegerField(verbose_name='Номер рейса')),
+                ('airline_code', models.CharField(max_length=2, verbose_name='IATA-код авиакомпании')),
+                ('airplane_name', models.CharField(max_length=100, verbose_name='Модель самолета')),
+                ('tail_number', models.CharField(max_length=20, verbose_name='Бортовой номер')),
+                ('departure_airport_id', models.BigIntegerField(verbose_name='Аэропорт вылета')),
+                ('departure_iata', models.CharField(max_length=3, verbose_name='IATA-код аэропорта вылета')),
+                ('departure_name', models.CharField(max_length=255, verbose_name='Аэропорт вылета')),
+                ('arrival_airport_id', models.BigIntegerField(verbose_name='Аэропорт прибытия')),
+                ('arrival_iata', models.CharField(max_length=3, verbose_name='IATA-код аэропорта прибытия')),
+                ('arrival_name', models.CharField(max_length=255, verbose_name='Аэропорт прибытия')),
+                ('planned_departure', models.DateTimeField(null=True, verbose_name='Запланированное время вылета')),
+                ('planned_arrival', models.DateTimeField(null=True, verbose_name='Запланированное время прибытия')),
+                ('board_time', models.DateTimeField(null=True, verbose_name='Время на табло')),
+                ('actual_departure', models.DateTimeField(null=True, verbose_name='Фактическое время вылета')),
+                ('actual_arrival', models.DateTimeField(null=True, verbose_name='Фактическое время прибытия')),
+                ('status_id', models.BigIntegerField(verbose_name='Статус рейса')),
+                ('status_name', models.CharField(max_length=50, verbose_name='Статус рейса')),
+                ('gates', models.CharField(blank=True, max_length=255, verbose_name='Посадочные выходы')),
+                ('desks', models.CharField(blank=True, max_length=255, verbose_name='Стойки регистрации')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Дата обновления')),
+            ],
+            options={
+                'verbose_name': 'Строка табло',
+                'verbose_name_plural': 'Табло рейсов',
+                'indexes': [models.Index(fields=['board_time', 'flight'], name='boardflight_time_idx')],
+            },
+        ),
+        migrations.RunPython(fill_board, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dbapp', '0007_boardflight'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='flight',
+            index=models.Index(fields=['departure_airport', 'planned_departure'], name='flight_departure_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='flight',
+            index=models.Index(fields=['arrival_airport', 'planned_arrival'], name='flight_arrival_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='boardflight',
+            index=models.Index(fields=['departure_airport_id', 'planned_departure'], name='boardflight_departure_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='boardflight',
+            index=models.Index(fields=['arrival_airport_id', 'planned_arrival'], name='boardflight_arrival_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dbapp', '0008_flight_time_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='passenger',
+            name='passport_hash',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=64, null=True, verbose_name='Индекс паспорта'),
+        ),
+        migrations.AddField(
+            model_name='worker',
+            name='phone_hash',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=64, null=True, verbose_name='Индекс телефона'),
+        ),
+    ]
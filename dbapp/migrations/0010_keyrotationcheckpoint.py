@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dbapp', '0009_blind_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='KeyRotationCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('field', models.CharField(max_length=100, verbose_name='Поле')),
+                ('key_id', models.CharField(max_length=64, verbose_name='Идентификатор ключа')),
+                ('last_pk', models.BigIntegerField(default=0, verbose_name='Последний обработанный ключ')),
+                ('rotated', models.BigIntegerField(default=0, verbose_name='Перешифровано записей')),
+                ('started_at', models.DateTimeField(auto_now_add=True, verbose_name='Начало')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Обновлено')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Завершено')),
+            ],
+            options={
+                'verbose_name': 'Контрольная точка смены ключа',
+                'verbose_name_plural': 'Контрольные точки смены ключа',
+                'constraints': [models.UniqueConstraint(fields=('field', 'key_id'), name='keyrotation_field_key_unique')],
+            },
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dbapp', '0010_keyrotationcheckpoint'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='passenger',
+            index=models.Index(fields=['last_name', 'first_name', 'middle_name'], name='passenger_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='passenger',
+            index=models.Index(fields=['flight', 'last_name', 'first_name'], name='passenger_flight_name_idx'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:41
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def fill_airline_code(apps, schema_editor):
+    Airplane = apps.get_model('dbapp', 'Airplane')
+    Flight = apps.get_model('dbapp', 'Flight')
+    Flight.objects.update(airline_code=Subquery(
+        Airplane.objects.filter(pk=OuterRef('airplane_id')).values('airline__IATA_code')[:1]
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dbapp', '0011_passenger_name_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='flight',
+            name='airline_code',
+            field=models.CharField(blank=True, default='', editable=False, max_length=2, verbose_name='IATA-код авиакомпании'),
+            preserve_default=False,
+        ),
+        migrations.RunPython(fill_airline_code, migrations.RunPython.noop),
+    ]
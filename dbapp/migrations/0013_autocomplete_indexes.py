@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dbapp', '0012_flight_airline_code'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='flight',
+            index=models.Index(fields=['airline_code', 'number'], name='flight_code_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='worker',
+            index=models.Index(fields=['last_name', 'first_name'], name='worker_name_idx'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dbapp', '0014_importjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importjob',
+            name='dry_run',
+            field=models.BooleanField(default=False, verbose_name='Только проверка'),
+        ),
+        migrations.RemoveField(
+            model_name='importjob',
+            name='errors',
+        ),
+        migrations.AddField(
+            model_name='importjob',
+            name='report',
+            field=models.JSONField(blank=True, default=dict, verbose_name='Отчёт об ошибках'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+from django.conf import settings
+from django.db import migrations
+from django.db.models.functions import Coalesce
+
+
+def fill_board_time(apps, schema_editor):
+    BoardFlight = apps.get_model('dbapp', 'BoardFlight')
+    departures = BoardFlight.objects.filter(departure_airport_id=settings.HOME_AIRPORT_ID)
+    departures.update(board_time=Coalesce('planned_departure', 'planned_arrival'))
+    BoardFlight.objects.exclude(departure_airport_id=settings.HOME_AIRPORT_ID).update(
+        board_time=Coalesce('planned_arrival', 'planned_departure')
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dbapp', '0016_boardversion'),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_board_time, migrations.RunPython.noop),
+    ]
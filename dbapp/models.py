@@ -1,11 +1,16 @@
+import hashlib
+import hmac
 import os
 import re
 from typing import cast
+from django.conf import settings
 from django.db import models
+from django.db.models import Q
+from django.db.models.functions import Cast, Concat, Now
 from django.contrib.auth.models import AbstractUser
 from django.core.exceptions import ValidationError
 from django.dispatch import receiver
-from django.db.models.signals import pre_save, post_delete
+from django.db.models.signals import pre_save, post_save, post_delete
 from fernet_fields import EncryptedTextField
 
 def validate_phone(value: str):
@@ -15,6 +20,12 @@ def validate_phone(value: str):
             "Телефон должен содержать 11 цифр. Пример: 79254717170"
         )
 
+def blind_index(value: str | None) -> str | None:
+    if not value:
+        return None
+    normalized = re.sub(r'[\W_]', '', value).upper()
+    return hmac.new(settings.BLIND_INDEX_KEY.encode(), normalized.encode(), hashlib.sha256).hexdigest()
+
 class Worker(AbstractUser):
     middle_name = models.CharField(
         "Отчество",
@@ -29,19 +40,38 @@ class Worker(AbstractUser):
         validators=[validate_phone],
         help_text="Введите номер телефона в формате +7 (XXX) XXX-XX-XX"
     )
+    phone_hash = models.CharField(
+        'Индекс телефона',
+        max_length=64,
+        null=True,
+        blank=True,
+        editable=False,
+        db_index=True
+    )
 
     def save(self, *args, **kwargs):
         if self.phone:
             self.phone = re.sub(r"\D", "", self.phone)
+        self.phone_hash = blind_index(self.phone)
+        if kwargs.get('update_fields') and 'phone' in kwargs['update_fields']:
+            kwargs['update_fields'] = {*kwargs['update_fields'], 'phone_hash'}
         super().save(*args, **kwargs)
 
     class Meta:
         verbose_name = "Сотрудник"
         verbose_name_plural = "Сотрудники"
+        indexes = [
+            models.Index(fields=['last_name', 'first_name'], name='worker_name_idx'),
+        ]
 
     def __str__(self):
         return f'{self.last_name} {self.first_name} {self.middle_name}'
 
+    @property
+    def group_names(self) -> str:
+        # Reads through groups.all() so that prefetch_related('groups') is used
+        return ', '.join(group.name for group in self.groups.all())
+
 class CheckInDesk(models.Model):
     number = models.CharField(
         "Номер стойки регистрации",
@@ -286,6 +316,12 @@ class Flight(models.Model):
         verbose_name='Статус рейса',
         help_text='Выберите статус рейса'
     )
+    airline_code = models.CharField(
+        'IATA-код авиакомпании',
+        max_length=2,
+        blank=True,
+        editable=False
+    )
 
     class Meta:
         verbose_name = 'Рейс'
@@ -293,17 +329,45 @@ class Flight(models.Model):
         permissions = [
             ('change_flight_status', 'Можно изменить Статус рейса')
         ]
+        indexes = [
+            models.Index(fields=['departure_airport', 'planned_departure'], name='flight_departure_time_idx'),
+            models.Index(fields=['arrival_airport', 'planned_arrival'], name='flight_arrival_time_idx'),
+            models.Index(fields=['airline_code', 'number'], name='flight_code_idx'),
+        ]
 
     def __str__(self) -> str:
-        return f'{self.airplane.airline.IATA_code} {self.number}'
+        return f'{self.airline_code} {self.number}'
+
+    @classmethod
+    def refresh_airline_codes(cls, flights: models.QuerySet):
+        flights.update(airline_code=models.Subquery(
+            Airplane.objects.filter(pk=models.OuterRef('airplane_id')).values('airline__IATA_code')[:1]
+        ))
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        flight = super().from_db(db, field_names, values)
+        flight._loaded_airplane_id = flight.__dict__.get('airplane_id')
+        return flight
+
+    def save(self, *args, **kwargs):
+        airplane = self._state.fields_cache.get('airplane')
+        if airplane is not None and airplane.pk == self.airplane_id and 'airline' in airplane._state.fields_cache:
+            self.airline_code = airplane.airline.IATA_code
+        elif not self.airline_code or self.airplane_id != getattr(self, '_loaded_airplane_id', None):
+            self.airline_code = Airplane.objects.filter(pk=self.airplane_id).values_list('airline__IATA_code', flat=True).first() or '' # type: ignore
+        self._loaded_airplane_id = self.airplane_id
+        if kwargs.get('update_fields') and 'airplane' in kwargs['update_fields']:
+            kwargs['update_fields'] = {*kwargs['update_fields'], 'airline_code'}
+        super().save(*args, **kwargs)
     
     def clean(self):
         errors = {}
 
-        if self.departure_airport.pk == 1 and not self.planned_departure:
+        if self.departure_airport_id == settings.HOME_AIRPORT_ID and not self.planned_departure:
             errors['planned_departure'] = 'Для рейсов, вылетающих из данного аэропорта, необходимо указать время вылета'
         
-        if self.arrival_airport.pk == 1 and not self.planned_arrival:
+        if self.arrival_airport_id == settings.HOME_AIRPORT_ID and not self.planned_arrival:
             errors['planned_arrival'] = 'Для рейсов, прибывающие в данный аэропорт, необходимо указать время прибытия'
 
 class CheckInDeskFlight(models.Model):
@@ -428,6 +492,14 @@ class Passenger(models.Model):
         max_length=1024,
         help_text='Введите паспорт пассажира'
     )
+    passport_hash = models.CharField(
+        'Индекс паспорта',
+        max_length=64,
+        null=True,
+        blank=True,
+        editable=False,
+        db_index=True
+    )
     flight = models.ForeignKey(
         Flight,
         models.PROTECT,
@@ -457,10 +529,20 @@ class Passenger(models.Model):
             ('change_check_in_passed_passenger', 'Можно изменить Пройдена регистрация'),
             ('change_boarding_passed_passenger', 'Можно изменить Посадка выполнена')
         ]
+        indexes = [
+            models.Index(fields=['last_name', 'first_name', 'middle_name'], name='passenger_name_idx'),
+            models.Index(fields=['flight', 'last_name', 'first_name'], name='passenger_flight_name_idx'),
+        ]
 
     def __str__(self):
         return f'{self.last_name} {self.first_name} {self.middle_name}'
 
+    def save(self, *args, **kwargs):
+        self.passport_hash = blind_index(self.passport)
+        if kwargs.get('update_fields') and 'passport' in kwargs['update_fields']:
+            kwargs['update_fields'] = {*kwargs['update_fields'], 'passport_hash'}
+        super().save(*args, **kwargs)
+
 class Baggage(models.Model):
     passenger = models.ForeignKey(
         Passenger,
@@ -515,6 +597,129 @@ class BoardingPass(models.Model):
         verbose_name = 'Посадочный талон'
         verbose_name_plural = 'Посадочные талоны'
 
+class BoardFlight(models.Model):
+    flight = models.OneToOneField(
+        Flight,
+        models.CASCADE,
+        primary_key=True,
+        verbose_name='Рейс'
+    )
+    code = models.CharField('Код рейса', max_length=20)
+    number = models.IntegerField('Номер рейса')
+    airline_code = models.CharField('IATA-код авиакомпании', max_length=2)
+    airplane_name = models.CharField('Модель самолета', max_length=100)
+    tail_number = models.CharField('Бортовой номер', max_length=20)
+    departure_airport_id = models.BigIntegerField('Аэропорт вылета')
+    departure_iata = models.CharField('IATA-код аэропорта вылета', max_length=3)
+    departure_name = models.CharField('Аэропорт вылета', max_length=255)
+    arrival_airport_id = models.BigIntegerField('Аэропорт прибытия')
+    arrival_iata = models.CharField('IATA-код аэропорта прибытия', max_length=3)
+    arrival_name = models.CharField('Аэропорт прибытия', max_length=255)
+    planned_departure = models.DateTimeField('Запланированное время вылета', null=True)
+    planned_arrival = models.DateTimeField('Запланированное время прибытия', null=True)
+    board_time = models.DateTimeField('Время на табло', null=True)
+    actual_departure = models.DateTimeField('Фактическое время вылета', null=True)
+    actual_arrival = models.DateTimeField('Фактическое время прибытия', null=True)
+    status_id = models.BigIntegerField('Статус рейса')
+    status_name = models.CharField('Статус рейса', max_length=50)
+    gates = models.CharField('Посадочные выходы', max_length=255, blank=True)
+    desks = models.CharField('Стойки регистрации', max_length=255, blank=True)
+    updated_at = models.DateTimeField('Дата обновления', auto_now=True)
+
+    class Meta:
+        verbose_name = 'Строка табло'
+        verbose_name_plural = 'Табло рейсов'
+        indexes = [
+            models.Index(fields=['board_time', 'flight'], name='boardflight_time_idx'),
+            models.Index(fields=['departure_airport_id', 'planned_departure'], name='boardflight_departure_idx'),
+            models.Index(fields=['arrival_airport_id', 'planned_arrival'], name='boardflight_arrival_idx'),
+        ]
+
+    def __str__(self) -> str:
+        return self.code
+
+    REFRESH_CHUNK_SIZE = 500
+
+    @classmethod
+    def refresh(cls, flights: models.QuerySet):
+        # Chunked so that memory stays bounded and the IN list stays under the
+        # SQL Server limit of 2100 parameters however many flights are refreshed
+        flights = flights.select_related(
+            'airplane__airline',
+            'departure_airport',
+            'arrival_airport',
+            'flight_status',
+            'flighttime',
+        ).prefetch_related(
+            'gateflight_set__gate',
+            'checkindeskflight_set__desk',
+        )
+
+        rows = []
+        for flight in flights.iterator(chunk_size=cls.REFRESH_CHUNK_SIZE):
+            try:
+                flight_time = flight.flighttime # type: ignore
+            except FlightTime.DoesNotExist:
+                flight_time = None
+
+            airline_code = flight.airplane.airline.IATA_code
+            rows.append(cls(
+                flight=flight,
+                code=f'{airline_code} {flight.number}',
+                number=flight.number,
+                airline_code=airline_code,
+                airplane_name=flight.airplane.name,
+                tail_number=flight.airplane.tail_number,
+                departure_airport_id=flight.departure_airport.pk,
+                departure_iata=flight.departure_airport.IATA_code,
+                departure_name=flight.departure_airport.name,
+                arrival_airport_id=flight.arrival_airport.pk,
+                arrival_iata=flight.arrival_airport.IATA_code,
+                arrival_name=flight.arrival_airport.name,
+                planned_departure=flight.planned_departure,
+                planned_arrival=flight.planned_arrival,
+                board_time=cls.time_on_board(flight.departure_airport_id, flight.planned_departure, flight.planned_arrival), # type: ignore
+                actual_departure=flight_time.actual_departure if flight_time else None,
+                actual_arrival=flight_time.actual_arrival if flight_time else None,
+                status_id=flight.flight_status.pk,
+                status_name=flight.flight_status.name,
+                gates=', '.join(gf.gate.number for gf in flight.gateflight_set.all()), # type: ignore
+                desks=', '.join(cf.desk.number for cf in flight.checkindeskflight_set.all()), # type: ignore
+            ))
+            if len(rows) >= cls.REFRESH_CHUNK_SIZE:
+                cls._replace(rows)
+                rows = []
+
+        if rows:
+            cls._replace(rows)
+
+    @staticmethod
+    def time_on_board(departure_airport_id: int, planned_departure, planned_arrival):
+        # Flights leaving the home airport are shown at their departure, arriving ones at their arrival
+        if departure_airport_id == settings.HOME_AIRPORT_ID:
+            return planned_departure or planned_arrival
+        return planned_arrival or planned_departure
+
+    @classmethod
+    def _replace(cls, rows: list['BoardFlight']):
+        cls.objects.filter(flight_id__in=[row.flight_id for row in rows]).delete() # type: ignore
+        cls.objects.bulk_create(rows, batch_size=cls.REFRESH_CHUNK_SIZE)
+
+    @staticmethod
+    def code_for(airline_code: str):
+        return Concat(models.Value(f'{airline_code} '), Cast('number', models.CharField(max_length=20)))
+
+class BoardVersion(models.Model):
+    """Single-row counter of board changes: the database keeps it monotonic across processes and cache evictions."""
+    value = models.BigIntegerField('Версия', default=0)
+
+    class Meta:
+        verbose_name = 'Версия табло'
+        verbose_name_plural = 'Версии табло'
+
+    def __str__(self) -> str:
+        return str(self.value)
+
 class AnalyticsFlight(models.Model):
     id = models.CharField(primary_key=True, max_length=50)
     number = models.IntegerField()
@@ -649,6 +854,62 @@ class BackupLog(models.Model):
     def can_be_restored(self):
         return self.status == 'success' and os.path.exists(self.file_path)
 
+class KeyRotationCheckpoint(models.Model):
+    field = models.CharField('Поле', max_length=100)
+    key_id = models.CharField('Идентификатор ключа', max_length=64)
+    last_pk = models.BigIntegerField('Последний обработанный ключ', default=0)
+    rotated = models.BigIntegerField('Перешифровано записей', default=0)
+    started_at = models.DateTimeField('Начало', auto_now_add=True)
+    updated_at = models.DateTimeField('Обновлено', auto_now=True)
+    finished_at = models.DateTimeField('Завершено', null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'Контрольная точка смены ключа'
+        verbose_name_plural = 'Контрольные точки смены ключа'
+        constraints = [
+            models.UniqueConstraint(fields=['field', 'key_id'], name='keyrotation_field_key_unique'),
+        ]
+
+    def __str__(self):
+        return f'{self.field} ({self.key_id[:8]})'
+
+class ImportJob(models.Model):
+    STATUS_CHOICES = [
+        ('pending', 'В очереди'),
+        ('running', 'Выполняется'),
+        ('success', 'Завершён'),
+        ('error', 'Ошибка'),
+    ]
+
+    kind = models.CharField('Тип импорта', max_length=20)
+    dry_run = models.BooleanField('Только проверка', default=False)
+    file_path = models.CharField('Путь к файлу', max_length=500)
+    status = models.CharField('Статус', max_length=10, choices=STATUS_CHOICES, default='pending')
+    rows_done = models.IntegerField('Обработано строк', default=0)
+    imported = models.IntegerField('Импортировано записей', default=0)
+    error_count = models.IntegerField('Количество ошибок', default=0)
+    report = models.JSONField('Отчёт об ошибках', default=dict, blank=True)
+    message = models.TextField('Сообщение', blank=True)
+    created_by = models.ForeignKey(
+        Worker,
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        verbose_name='Запустил',
+        related_name='import_jobs'
+    )
+    created_at = models.DateTimeField('Дата создания', auto_now_add=True)
+    started_at = models.DateTimeField('Начало', null=True, blank=True)
+    finished_at = models.DateTimeField('Завершено', null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'Задача импорта'
+        verbose_name_plural = 'Задачи импорта'
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f'Импорт {self.kind} #{self.pk}'
+
 @receiver(pre_save, sender='dbapp.Worker')
 def deactivate_worker(sender, instance: Worker, **kwargs):
     if instance.pk:
@@ -660,3 +921,59 @@ def deactivate_worker(sender, instance: Worker, **kwargs):
 def delete_worker(sender, instance: Worker, **kwargs):
     CheckInDesk.objects.filter(worker=instance).update(worker=None, is_active=False)
 
+
+@receiver([post_save, post_delete], sender='dbapp.FlightTime')
+@receiver([post_save, post_delete], sender='dbapp.GateFlight')
+@receiver([post_save, post_delete], sender='dbapp.CheckInDeskFlight')
+def refresh_board_flight_children(sender, instance, **kwargs):
+    BoardFlight.refresh(Flight.objects.filter(pk=instance.pk if sender is FlightTime else instance.flight_id))
+
+@receiver(post_save, sender='dbapp.Airplane')
+def sync_flight_airline_code_airplane(sender, instance: Airplane, **kwargs):
+    Flight.objects.filter(airplane=instance).exclude(airline_code=instance.airline.IATA_code).update(airline_code=instance.airline.IATA_code)
+
+@receiver(post_save, sender='dbapp.Airline')
+def sync_flight_airline_code_airline(sender, instance: Airline, **kwargs):
+    Flight.objects.filter(airplane__airline=instance).exclude(airline_code=instance.IATA_code).update(airline_code=instance.IATA_code)
+
+@receiver(post_save, sender='dbapp.Flight')
+def refresh_board_flight(sender, instance: Flight, **kwargs):
+    BoardFlight.refresh(Flight.objects.filter(pk=instance.pk))
+
+# The receivers below rewrite only the board columns they own, and only in rows
+# where a displayed value actually changed, with one UPDATE each
+
+@receiver(post_save, sender='dbapp.Airplane')
+def refresh_board_airplane(sender, instance: Airplane, **kwargs):
+    airline_code = instance.airline.IATA_code
+    BoardFlight.objects.filter(flight__airplane=instance).filter(
+        ~Q(airplane_name=instance.name) | ~Q(tail_number=instance.tail_number) | ~Q(airline_code=airline_code)
+    ).update(
+        airplane_name=instance.name,
+        tail_number=instance.tail_number,
+        airline_code=airline_code,
+        code=BoardFlight.code_for(airline_code),
+        updated_at=Now(),
+    )
+
+@receiver(post_save, sender='dbapp.Airline')
+def refresh_board_airline(sender, instance: Airline, **kwargs):
+    BoardFlight.objects.filter(flight__airplane__airline=instance).exclude(airline_code=instance.IATA_code).update(
+        airline_code=instance.IATA_code,
+        code=BoardFlight.code_for(instance.IATA_code),
+        updated_at=Now(),
+    )
+
+@receiver(post_save, sender='dbapp.Airport')
+def refresh_board_airport(sender, instance: Airport, **kwargs):
+    for side in ('departure', 'arrival'):
+        BoardFlight.objects.filter(**{f'{side}_airport_id': instance.pk}).filter(
+            ~Q(**{f'{side}_iata': instance.IATA_code}) | ~Q(**{f'{side}_name': instance.name})
+        ).update(**{f'{side}_iata': instance.IATA_code, f'{side}_name': instance.name}, updated_at=Now())
+
+@receiver(post_save, sender='dbapp.FlightStatus')
+def refresh_board_status(sender, instance: FlightStatus, **kwargs):
+    BoardFlight.objects.filter(status_id=instance.pk).exclude(status_name=instance.name).update(
+        status_name=instance.name,
+        updated_at=Now(),
+    )
@@ -0,0 +1,12 @@
+# Runs inside ProcessPoolExecutor workers: keep this module free of Django
+# imports so that it can be loaded by spawned processes before django.setup().
+from cryptography.fernet import Fernet, MultiFernet
+
+_fernet: MultiFernet | None = None
+
+def init_worker(keys: list[bytes]):
+    global _fernet
+    _fernet = MultiFernet([Fernet(key) for key in keys])
+
+def rotate_tokens(tokens: list[bytes]) -> list[bytes]:
+    return [_fernet.rotate(token) for token in tokens] # type: ignore
@@ -95,16 +95,27 @@ class GroupViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = Group.objects.all()
     serializer_class = GroupSerializer
 
+READ_ONLY_MODELS = {
+    'BoardFlight': ['board_time', 'flight'],
+}
+
 def create_viewset_for_model(model_class):
     serializer_class = SERIALIZERS[model_class.__name__]
+    ordering = READ_ONLY_MODELS.get(model_class.__name__)
     return type(
         f'{model_class.__name__}ViewSet',
-        (BaseViewSet,),
+        (viewsets.ReadOnlyModelViewSet if ordering else BaseViewSet,),
         {
-            'queryset': model_class.objects.all(),
+            'queryset': model_class.objects.order_by(*ordering) if ordering else model_class.objects.all(),
             'serializer_class': serializer_class
         }
     )
 
+# Internal bookkeeping, not exposed through the API
+API_EXCLUDED_MODELS = {'BoardVersion', 'ImportJob', 'KeyRotationCheckpoint'}
+
 models = apps.get_app_config('dbapp').get_models()
-VIEWSETS = {model.__name__: create_viewset_for_model(model) for model in models}
+VIEWSETS = {
+    model.__name__: create_viewset_for_model(model)
+    for model in models if model.__name__ not in API_EXCLUDED_MODELS
+}
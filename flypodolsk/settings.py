@@ -12,7 +12,7 @@ https://docs.djangoproject.com/en/5.0/ref/settings/
 
 import os
 from pathlib import Path
-from decouple import config
+from decouple import Csv, config
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -24,6 +24,15 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 # SECURITY WARNING: keep the secret key used in production secret!
 SECRET_KEY = config('SECRET_KEY')
 
+# Keys of the encrypted fields, newest first. Older keys are only used for decryption
+# until `manage.py rotate_fernet_keys` has re-encrypted the data with the first one.
+# The SECRET_KEY fallback is not passed through Csv, which would cut it at '#' or fail on quotes
+FERNET_KEYS = config('FERNET_KEYS', default='', cast=Csv()) or [SECRET_KEY]
+
+# Key for the HMAC blind indexes of encrypted fields (passport, phone).
+# Changing it requires `manage.py rebuild_blind_indexes`.
+BLIND_INDEX_KEY = config('BLIND_INDEX_KEY', default=SECRET_KEY)
+
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = True
 
@@ -99,6 +108,40 @@ DATABASES = {
     }
 }
 
+# Cache
+# https://docs.djangoproject.com/en/5.0/topics/cache/
+# Shared between all worker processes: the public flight board is served from here.
+
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.filebased.FileBasedCache'),
+        'LOCATION': config('CACHE_LOCATION', default=os.path.join(BASE_DIR, 'cache')),
+        # Board snapshots, fragments and row versions need far more than the default 300 entries
+        'OPTIONS': {
+            'MAX_ENTRIES': config('CACHE_MAX_ENTRIES', default=50000, cast=int),
+        },
+    }
+}
+
+# Flight board
+# Flights of the home airport are shown from now - PAST to now + FUTURE hours in window mode.
+
+HOME_AIRPORT_ID = config('HOME_AIRPORT_ID', default=1, cast=int)
+BOARD_WINDOW_PAST_HOURS = config('BOARD_WINDOW_PAST_HOURS', default=2, cast=int)
+BOARD_WINDOW_FUTURE_HOURS = config('BOARD_WINDOW_FUTURE_HOURS', default=12, cast=int)
+
+# Pre-rendered public board, written by `manage.py render_board`
+
+BOARD_ARTIFACT_DIR = config('BOARD_ARTIFACT_DIR', default=os.path.join(BASE_DIR, 'board'))
+
+os.makedirs(BOARD_ARTIFACT_DIR, exist_ok=True)
+
+# Uploaded CSV files waiting for a background import job
+
+IMPORT_DIR = config('IMPORT_DIR', default=os.path.join(BASE_DIR, 'imports'))
+
+os.makedirs(IMPORT_DIR, exist_ok=True)
+
 BACKUP_DIR = os.path.join(BASE_DIR, 'backups')
 DB_BACKUP_DIR = os.path.join(BACKUP_DIR, 'database')
 
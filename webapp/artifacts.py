@@ -0,0 +1,109 @@
+import gzip
+import json
+import os
+import re
+import tempfile
+
+from django.conf import settings
+from django.contrib import messages
+from django.contrib.auth.models import AnonymousUser
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import FileResponse, HttpRequest, QueryDict
+from django.template.loader import render_to_string
+from django.utils.cache import patch_vary_headers
+
+from webapp.board import board_context, board_snapshot, board_version, board_window
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+ARTIFACT_VERSION_FILE = 'VERSION'
+
+_ACCEPTS = {
+    'br': re.compile(r'\bbr\b'),
+    'gzip': re.compile(r'\bgzip\b'),
+}
+
+_SUFFIXES = {'br': '.br', 'gzip': '.gz'}
+
+def _compressors() -> dict:
+    compressors = {'gzip': lambda data: gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli:
+        compressors['br'] = lambda data: brotli.compress(data, quality=11)
+    return compressors
+
+def _artifact_path(name: str) -> str:
+    return os.path.join(settings.BOARD_ARTIFACT_DIR, name)
+
+def _write_atomic(name: str, data: bytes):
+    fd, tmp_path = tempfile.mkstemp(dir=settings.BOARD_ARTIFACT_DIR, prefix=f'.{name}.')
+    try:
+        with os.fdopen(fd, 'wb') as tmp:
+            tmp.write(data)
+        os.replace(tmp_path, _artifact_path(name))
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+def board_tag(version: int, window: tuple) -> str:
+    # The default board shows the sliding window, so the artifacts go stale with it as well as with the version
+    return f'{version}@{window[0].timestamp():.0f}'
+
+def current_board_tag() -> str:
+    return board_tag(board_version(), board_window())
+
+def artifact_tag() -> str | None:
+    try:
+        with open(_artifact_path(ARTIFACT_VERSION_FILE)) as file:
+            return file.read()
+    except OSError:
+        return None
+
+def _anonymous_request() -> HttpRequest:
+    request = HttpRequest()
+    request.method = 'GET'
+    request.path = request.path_info = '/'
+    request.user = AnonymousUser()
+    return request
+
+def render_board_artifacts() -> int:
+    window = board_window()
+    snapshot = board_snapshot(QueryDict())
+    documents = {
+        'index.html': render_to_string('index.html', board_context(snapshot), request=_anonymous_request()),
+        'board.json': json.dumps(snapshot, cls=DjangoJSONEncoder),
+    }
+
+    for name, document in documents.items():
+        data = document.encode()
+        for encoding, compress in _compressors().items():
+            _write_atomic(name + _SUFFIXES[encoding], compress(data))
+
+    # Tagged with the window taken before the snapshot: if it moved meanwhile, the tag is simply stale
+    _write_atomic(ARTIFACT_VERSION_FILE, board_tag(snapshot['version'], window).encode())
+    return snapshot['version']
+
+def serve_board_artifact(request: HttpRequest, name: str, content_type: str) -> FileResponse | None:
+    if request.method not in ('GET', 'HEAD') or len(messages.get_messages(request)):
+        return None
+
+    if artifact_tag() != current_board_tag():
+        return None
+
+    accept_encoding = request.headers.get('Accept-Encoding', '')
+    for encoding, pattern in _ACCEPTS.items():
+        if not pattern.search(accept_encoding):
+            continue
+        try:
+            file = open(_artifact_path(name + _SUFFIXES[encoding]), 'rb')
+        except OSError:
+            continue
+
+        response = FileResponse(file, content_type=content_type)
+        response['Content-Encoding'] = encoding
+        patch_vary_headers(response, ('Accept-Encoding', 'Cookie'))
+        return response
+
+    return None
@@ -0,0 +1,123 @@
+from typing import Callable
+
+from django.db.models import Model, Q, QuerySet
+from django.http import QueryDict
+from django.utils import timezone
+
+from dbapp.models import Airplane, Flight, Worker
+from webapp.listing import Listing, prefix_filter
+
+AUTOCOMPLETE_PAGE_SIZE = 20
+
+def flight_search(value: str) -> Q:
+    query = Q()
+    for word in value.split():
+        if word.isdigit():
+            query &= Q(number=int(word))
+        else:
+            query &= Q(airline_code__istartswith=word)
+    return query
+
+def airplane_search(value: str) -> Q:
+    return Q(tail_number__istartswith=value) | Q(name__istartswith=value)
+
+def flight_label(flight: Flight) -> str:
+    planned = flight.planned_departure or flight.planned_arrival
+    return f'{flight} ({timezone.localtime(planned):%d.%m.%Y %H:%M})' if planned else str(flight)
+
+class Autocomplete:
+    def __init__(
+        self,
+        queryset: QuerySet,
+        search: Callable[[str], Q],
+        sort: str,
+        permissions: list[str],
+        label: Callable[[Model], str] = str,
+        data: Callable[[Model], dict] | None = None,
+        related: list[str] | None = None,
+        scope: Callable[[QuerySet, QueryDict], QuerySet] | None = None,
+    ):
+        self.queryset = queryset
+        self.permissions = permissions
+        self.label = label
+        self.data = data
+        self.scope = scope
+        self.listing = Listing(
+            queryset.model,
+            sorts={sort: ''},
+            default_sort=sort,
+            filters={'q': search},
+            related=related,
+            page_size=AUTOCOMPLETE_PAGE_SIZE,
+        )
+
+    def option(self, instance: Model) -> dict:
+        option = {'id': instance.pk, 'text': self.label(instance)}
+        if self.data:
+            option['data'] = self.data(instance)
+        return option
+
+    def results(self, params: QueryDict) -> dict:
+        queryset = self.queryset.all()
+        if self.scope:
+            queryset = self.scope(queryset, params)
+        listing = self.listing.page(params, queryset)
+        return {
+            'results': [self.option(instance) for instance in listing['items']],
+            'next_cursor': listing['next_cursor'],
+        }
+
+def _unassigned(lookup: str, param: str) -> Callable[[QuerySet, QueryDict], QuerySet]:
+    def scope(flights: QuerySet, params: QueryDict) -> QuerySet:
+        value = params.get(param, '')
+        return flights.exclude(**{lookup: value}) if value.isdigit() else flights
+    return scope
+
+def _workers(group_ids: list[int]) -> QuerySet:
+    return Worker.objects.filter(groups__id__in=group_ids).distinct()
+
+AUTOCOMPLETES = {
+    'flights': Autocomplete(
+        Flight.objects.all(),
+        flight_search,
+        sort='-planned_departure',
+        permissions=['dbapp.add_passenger', 'dbapp.change_passenger'],
+        label=flight_label,
+    ),
+    'check_in_flights': Autocomplete(
+        Flight.objects.filter(flight_status__lt=9),
+        flight_search,
+        sort='-planned_departure',
+        permissions=['dbapp.change_checkindeskflight', 'dbapp.change_is_active_checkindeskflight'],
+        label=flight_label,
+        scope=_unassigned('checkindeskflight__desk', 'desk'),
+    ),
+    'gate_flights': Autocomplete(
+        Flight.objects.exclude(flight_status__in=[1, 2, 9]),
+        flight_search,
+        sort='-planned_departure',
+        permissions=['dbapp.change_gateflight', 'dbapp.change_is_active_gateflight'],
+        label=flight_label,
+        scope=_unassigned('gateflight__gate', 'gate'),
+    ),
+    'airplanes': Autocomplete(
+        Airplane.objects.all(),
+        airplane_search,
+        sort='tail_number',
+        permissions=['dbapp.add_flight', 'dbapp.view_flight'],
+        data=lambda airplane: {'iata': airplane.airline.IATA_code},
+        related=['airline'],
+    ),
+    'check_in_workers': Autocomplete(
+        _workers([1, 3]),
+        prefix_filter('last_name', 'first_name', 'middle_name'),
+        sort='last_name',
+        permissions=['dbapp.add_checkindesk', 'dbapp.view_checkindesk', 'dbapp.view_own_checkindesk'],
+    ),
+    'gate_workers': Autocomplete(
+        _workers([2, 3]),
+        prefix_filter('last_name', 'first_name', 'middle_name'),
+        sort='last_name',
+        permissions=['dbapp.add_gate', 'dbapp.view_gate', 'dbapp.view_own_gate'],
+    ),
+}
@@ -0,0 +1,511 @@
+import asyncio
+import hashlib
+import json
+import re
+import time
+import weakref
+from datetime import datetime, timedelta, timezone as dt_timezone
+from urllib.parse import urlencode
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DatabaseError, transaction
+from django.db.models import F, Q, QuerySet
+from django.http import HttpRequest, QueryDict
+
+from dbapp.models import Airport, BoardFlight, BoardVersion, CheckInDeskFlight, Flight, FlightStatus, FlightTime, GateFlight
+
+HOME_AIRPORT_ID = settings.HOME_AIRPORT_ID
+
+BOARD_PAGE_SIZE = 50
+BOARD_MAX_PAGE_SIZE = 200
+
+BOARD_VERSION_ID = 1
+BOARD_CACHE_TIMEOUT = 60 * 60
+
+BOARD_EVENT_TIMEOUT = 10 * 60
+BOARD_STREAM_POLL_INTERVAL = 1
+BOARD_STREAM_HEARTBEAT = 15
+BOARD_STREAM_MAX_BACKLOG = 500
+BOARD_STREAM_LIFETIME = 5 * 60
+
+BOARD_WINDOW_STEP = 60
+FIDS_WINDOW_STEP = 15 * 60
+
+BOARD_FILTERS = ['type', 'window', 'number', 'airplane', 'status', 'departure', 'arrival']
+# The board opens on the flights around now; the whole history is one choice away
+BOARD_FILTER_DEFAULTS = {'type': 'all', 'window': 'now'}
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+_FLIGHT_CODE_RE = re.compile(r'^([A-Za-zА-Яа-я][A-Za-zА-Яа-я0-9]|[0-9][A-Za-zА-Яа-я])\s*(\d+)$')
+
+def board_queryset() -> QuerySet:
+    return BoardFlight.objects.all()
+
+def _int_param(value: str | None) -> int | None:
+    try:
+        return int(value) if value else None
+    except ValueError:
+        return None
+
+def clean_board_filters(params: QueryDict) -> dict:
+    filters = {
+        'type': params.get('type', BOARD_FILTER_DEFAULTS['type']),
+        'window': params.get('window', BOARD_FILTER_DEFAULTS['window']),
+        'number': params.get('number', '').strip(),
+        'airplane': params.get('airplane', '').strip(),
+        'status': _int_param(params.get('status')),
+        'departure': _int_param(params.get('departure')),
+        'arrival': _int_param(params.get('arrival')),
+    }
+    if filters['type'] not in ('all', 'departures', 'arrivals'):
+        filters['type'] = BOARD_FILTER_DEFAULTS['type']
+    if filters['window'] not in ('all', 'now'):
+        filters['window'] = BOARD_FILTER_DEFAULTS['window']
+    return filters
+
+def board_window(step: int = BOARD_WINDOW_STEP) -> tuple[datetime, datetime]:
+    now = int(time.time()) // step * step
+    anchor = _EPOCH + timedelta(seconds=now)
+    return (
+        anchor - timedelta(hours=settings.BOARD_WINDOW_PAST_HOURS),
+        anchor + timedelta(hours=settings.BOARD_WINDOW_FUTURE_HOURS),
+    )
+
+def board_window_tag(request: HttpRequest) -> str:
+    # The window slides with the clock, so a page showing it changes even when no flight does
+    if clean_board_filters(request.GET)['window'] != 'now':
+        return ''
+    return f'window={board_window()[0].timestamp():.0f}'
+
+def filter_board(queryset: QuerySet, filters: dict, window: tuple[datetime, datetime] | None = None) -> QuerySet:
+    departures = Q(departure_airport_id=HOME_AIRPORT_ID)
+    arrivals = Q(arrival_airport_id=HOME_AIRPORT_ID)
+    if window:
+        departures &= Q(planned_departure__range=window)
+        arrivals &= Q(planned_arrival__range=window)
+
+    if filters['type'] == 'departures':
+        queryset = queryset.filter(departures)
+    elif filters['type'] == 'arrivals':
+        queryset = queryset.filter(arrivals)
+    elif window:
+        queryset = queryset.filter(departures | arrivals)
+
+    number = filters['number']
+    if number:
+        match = _FLIGHT_CODE_RE.match(number)
+        if number.isdigit():
+            queryset = queryset.filter(number=int(number))
+        elif match:
+            queryset = queryset.filter(
+                airline_code__iexact=match.group(1),
+                number=int(match.group(2))
+            )
+        else:
+            queryset = queryset.filter(airline_code__iexact=number)
+
+    if filters['airplane']:
+        queryset = queryset.filter(
+            Q(airplane_name__icontains=filters['airplane']) |
+            Q(tail_number__icontains=filters['airplane'])
+        )
+
+    if filters['status']:
+        queryset = queryset.filter(status_id=filters['status'])
+    if filters['departure']:
+        queryset = queryset.filter(departure_airport_id=filters['departure'])
+    if filters['arrival']:
+        queryset = queryset.filter(arrival_airport_id=filters['arrival'])
+
+    return queryset
+
+def encode_cursor(flight: BoardFlight) -> str:
+    board_time = flight.board_time
+    if board_time is None:
+        return f'n.{flight.pk}'
+    micros = (board_time - _EPOCH) // timedelta(microseconds=1)
+    return f'{micros}.{flight.pk}'
+
+def decode_cursor(value: str | None) -> tuple[datetime | None, int] | None:
+    if not value:
+        return None
+    try:
+        time_part, pk_part = value.split('.', 1)
+        pk = int(pk_part)
+        if time_part == 'n':
+            return None, pk
+        return _EPOCH + timedelta(microseconds=int(time_part)), pk
+    except ValueError:
+        return None
+
+def _after(cursor: tuple[datetime | None, int]) -> Q:
+    board_time, pk = cursor
+    if board_time is None:
+        return Q(board_time__isnull=True, pk__gt=pk)
+    return (
+        Q(board_time__gt=board_time) |
+        Q(board_time=board_time, pk__gt=pk) |
+        Q(board_time__isnull=True)
+    )
+
+def _before(cursor: tuple[datetime | None, int]) -> Q:
+    board_time, pk = cursor
+    if board_time is None:
+        return Q(board_time__isnull=False) | Q(board_time__isnull=True, pk__lt=pk)
+    return (
+        Q(board_time__lt=board_time) |
+        Q(board_time=board_time, pk__lt=pk)
+    )
+
+def paginate_board(queryset: QuerySet, params: QueryDict) -> dict:
+    page_size = _int_param(params.get('page_size')) or BOARD_PAGE_SIZE
+    page_size = max(1, min(page_size, BOARD_MAX_PAGE_SIZE))
+
+    after = decode_cursor(params.get('after'))
+    before = decode_cursor(params.get('before')) if not after else None
+
+    ascending = [F('board_time').asc(nulls_last=True), 'pk']
+    descending = [F('board_time').desc(nulls_first=True), '-pk']
+
+    if before:
+        rows = list(queryset.filter(_before(before)).order_by(*descending)[:page_size + 1])
+        has_previous = len(rows) > page_size
+        flights = rows[:page_size][::-1]
+        has_next = True
+    else:
+        if after:
+            queryset = queryset.filter(_after(after))
+        rows = list(queryset.order_by(*ascending)[:page_size + 1])
+        has_next = len(rows) > page_size
+        flights = rows[:page_size]
+        has_previous = after is not None
+
+    return {
+        'flights': flights,
+        'page_size': page_size,
+        'next_cursor': encode_cursor(flights[-1]) if has_next and flights else None,
+        'previous_cursor': encode_cursor(flights[0]) if has_previous and flights else None,
+    }
+
+def board_version() -> int:
+    return BoardVersion.objects.filter(pk=BOARD_VERSION_ID).values_list('value', flat=True).first() or 0
+
+def bump_board_version() -> int:
+    # Call inside a transaction: the updated row stays locked until commit, so concurrent bumps are serialized
+    versions = BoardVersion.objects.filter(pk=BOARD_VERSION_ID)
+    if not versions.update(value=F('value') + 1):
+        BoardVersion.objects.get_or_create(pk=BOARD_VERSION_ID)
+        versions.update(value=F('value') + 1)
+    return versions.values_list('value', flat=True).get()
+
+def serialize_flight(flight: BoardFlight) -> dict:
+    return {
+        'id': flight.pk,
+        'code': flight.code,
+        'number': flight.number,
+        'airplane_name': flight.airplane_name,
+        'tail_number': flight.tail_number,
+        'departure_airport_id': flight.departure_airport_id,
+        'departure_iata': flight.departure_iata,
+        'departure_name': flight.departure_name,
+        'arrival_airport_id': flight.arrival_airport_id,
+        'arrival_iata': flight.arrival_iata,
+        'arrival_name': flight.arrival_name,
+        'planned_departure': flight.planned_departure,
+        'planned_arrival': flight.planned_arrival,
+        'actual_departure': flight.actual_departure,
+        'actual_arrival': flight.actual_arrival,
+        'status_id': flight.status_id,
+        'status_name': flight.status_name,
+        'updated_at': flight.updated_at,
+    }
+
+def _snapshot_key(version: int, filters: dict, params: QueryDict, window: tuple | None) -> str:
+    parts = [f'{key}={filters[key] or ""}' for key in BOARD_FILTERS]
+    parts += [f'{key}={params.get(key, "")}' for key in ('after', 'before', 'page_size')]
+    if window:
+        parts.append(f'from={window[0].timestamp():.0f}')
+    digest = hashlib.md5('&'.join(parts).encode()).hexdigest()
+    return f'board:page:{version}:{digest}'
+
+def board_options(version: int | None = None) -> dict:
+    version = version or board_version()
+    key = f'board:options:{version}'
+    options = cache.get(key)
+    if options is None:
+        options = {
+            'airports': list(Airport.objects.order_by('name').values('pk', 'name')),
+            'statuses': list(FlightStatus.objects.order_by('pk').values('pk', 'name')),
+        }
+        cache.set(key, options, BOARD_CACHE_TIMEOUT)
+    return options
+
+def board_snapshot(params: QueryDict) -> dict:
+    filters = clean_board_filters(params)
+    version = board_version()
+    window = board_window() if filters['window'] == 'now' else None
+    key = _snapshot_key(version, filters, params, window)
+
+    snapshot = cache.get(key)
+    if snapshot is None:
+        page = paginate_board(filter_board(board_queryset(), filters, window), params)
+        snapshot = {
+            **page,
+            'flights': [serialize_flight(flight) for flight in page['flights']],
+            'version': version,
+        }
+        cache.set(key, snapshot, BOARD_CACHE_TIMEOUT)
+
+    return {**snapshot, 'filters': filters}
+
+def board_context(snapshot: dict) -> dict:
+    filter_query = urlencode({
+        key: value for key, value in snapshot['filters'].items()
+        if value and value != BOARD_FILTER_DEFAULTS.get(key)
+    })
+
+    return {
+        **snapshot,
+        **board_options(snapshot['version']),
+        'filter_query': filter_query,
+    }
+
+def _event_key(version: int) -> str:
+    return f'board:event:{version}'
+
+def publish_board_event(payload: dict) -> int:
+    # The event is cached before the new version commits, so readers never see a version without its event
+    with transaction.atomic():
+        version = bump_board_version()
+        cache.set(_event_key(version), payload, BOARD_EVENT_TIMEOUT)
+    return version
+
+def publish_flight_event(flight_id: int):
+    flight = board_queryset().filter(pk=flight_id).first()
+    if flight:
+        publish_board_event(serialize_flight(flight))
+    else:
+        publish_board_event({'id': flight_id, 'deleted': True})
+
+def invalidate_board(sender, instance, **kwargs):
+    if isinstance(instance, (Flight, FlightTime)):
+        flight_id = instance.pk
+    elif isinstance(instance, (GateFlight, CheckInDeskFlight)):
+        flight_id = instance.flight_id # type: ignore
+    else:
+        transaction.on_commit(lambda: publish_board_event({'reset': True}))
+        return
+
+    transaction.on_commit(lambda: publish_flight_event(flight_id))
+
+def board_changes(since: int, current: int, events: dict) -> tuple[list[dict] | None, int]:
+    if current - since > BOARD_STREAM_MAX_BACKLOG:
+        return None, current
+
+    changes = []
+    for version in range(since + 1, current + 1):
+        payload = events.get(_event_key(version))
+        if payload is None:
+            if version == current:
+                return changes, version - 1
+            return None, current
+        if payload.get('reset'):
+            return None, current
+        changes.append({**payload, 'version': version})
+    return changes, current
+
+def board_change_keys(since: int, current: int) -> list[str]:
+    if current - since > BOARD_STREAM_MAX_BACKLOG:
+        return []
+    return [_event_key(version) for version in range(since + 1, current + 1)]
+
+def _sse(event: str, data: dict, event_id: int | None = None) -> str:
+    message = f'event: {event}\ndata: {json.dumps(data, cls=DjangoJSONEncoder)}\n\n'
+    if event_id is not None:
+        message = f'id: {event_id}\n{message}'
+    return message
+
+class BoardPoller:
+    """Follows the board version for all the streams of one event loop.
+
+    Reading the version and the events goes through sync_to_async, which runs on the
+    single thread shared by all sync code of the process, so one poll per interval is
+    made for every connected client instead of one per client.
+    """
+
+    def __init__(self):
+        self.version: int | None = None
+        self.events: dict[str, dict] = {}
+        self.changed = asyncio.Event()
+        self.clients = 0
+        self.task: asyncio.Task | None = None
+
+    async def join(self) -> int:
+        self.clients += 1
+        if self.version is None:
+            self.version = await sync_to_async(board_version)()
+        if self.task is None:
+            self.task = asyncio.create_task(self._run())
+        return self.version
+
+    def leave(self):
+        self.clients -= 1
+
+    async def _run(self):
+        try:
+            while self.clients:
+                await asyncio.sleep(BOARD_STREAM_POLL_INTERVAL)
+                try:
+                    current = await sync_to_async(board_version)()
+                except DatabaseError:
+                    continue
+                if current == self.version:
+                    continue
+
+                if self.version is not None and current > self.version:
+                    self.events.update(await cache.aget_many(board_change_keys(self.version, current)))
+                recent = set(board_change_keys(max(current - BOARD_STREAM_MAX_BACKLOG, 0), current))
+                self.events = {key: payload for key, payload in self.events.items() if key in recent}
+
+                self.version = current
+                self.changed.set()
+                self.changed = asyncio.Event()
+        finally:
+            self.task = None
+            self.version = None
+
+    async def changes(self, since: int, current: int) -> tuple[list[dict] | None, int]:
+        keys = board_change_keys(since, current)
+        events = {key: self.events[key] for key in keys if key in self.events}
+        missing = [key for key in keys if key not in events]
+        if missing:
+            events.update(await cache.aget_many(missing))
+        return board_changes(since, current, events)
+
+_pollers: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, BoardPoller] = weakref.WeakKeyDictionary()
+
+def board_poller() -> BoardPoller:
+    return _pollers.setdefault(asyncio.get_running_loop(), BoardPoller())
+
+async def board_events(last_seen: int | None):
+    poller = board_poller()
+    current = await poller.join()
+    try:
+        if last_seen is None or last_seen > current:
+            last_seen = current
+
+        yield f'retry: {BOARD_STREAM_POLL_INTERVAL * 3000}\n\n'
+
+        started = time.monotonic()
+        heartbeat = started
+        while time.monotonic() - started < BOARD_STREAM_LIFETIME:
+            # Taken before reading the version, so a change made meanwhile still wakes this stream
+            changed = poller.changed
+            current = poller.version or last_seen
+
+            if current > last_seen:
+                changes, last_seen = await poller.changes(last_seen, current)
+                if changes is None:
+                    yield _sse('reset', {'version': current}, current)
+                    return
+
+                for change in changes:
+                    yield _sse('flight', change, change['version'])
+                if changes:
+                    heartbeat = time.monotonic()
+
+            if time.monotonic() - heartbeat >= BOARD_STREAM_HEARTBEAT:
+                yield ': ping\n\n'
+                heartbeat = time.monotonic()
+
+            # An event not cached yet is read again on the next poll interval
+            timeout = BOARD_STREAM_POLL_INTERVAL if last_seen < current else BOARD_STREAM_HEARTBEAT - (time.monotonic() - heartbeat)
+            try:
+                await asyncio.wait_for(changed.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+    finally:
+        poller.leave()
+
+def fids_queryset(direction: str, window: tuple[datetime, datetime]) -> QuerySet:
+    filters = {**dict.fromkeys(BOARD_FILTERS), 'type': direction}
+    return filter_board(BoardFlight.objects.all(), filters, window).order_by(F('board_time').asc(nulls_last=True), 'pk')
+
+def _split_numbers(value: str) -> list[str]:
+    return [number for number in value.split(', ') if number]
+
+def fids_rows(queryset: QuerySet) -> list[dict]:
+    rows = []
+    for (pk, code, departure_id, departure_iata, arrival_iata, planned_departure, planned_arrival,
+         actual_departure, actual_arrival, status_id, gates, desks) in queryset.values_list(
+        'pk',
+        'code',
+        'departure_airport_id',
+        'departure_iata',
+        'arrival_iata',
+        'planned_departure',
+        'planned_arrival',
+        'actual_departure',
+        'actual_arrival',
+        'status_id',
+        'gates',
+        'desks',
+    ):
+        is_departure = departure_id == HOME_AIRPORT_ID
+        rows.append({
+            'id': pk,
+            'code': code,
+            'dir': 'D' if is_departure else 'A',
+            'iata': arrival_iata if is_departure else departure_iata,
+            'planned': planned_departure if is_departure else planned_arrival,
+            'actual': actual_departure if is_departure else actual_arrival,
+            'status': status_id,
+            'gates': _split_numbers(gates),
+            'desks': _split_numbers(desks),
+        })
+    return rows
+
+def fids_window() -> tuple[datetime, datetime]:
+    # Covers the exact board window for the whole step, so screens only trim the edges
+    start, end = board_window(FIDS_WINDOW_STEP)
+    return start, end + timedelta(seconds=FIDS_WINDOW_STEP)
+
+def fids_feed(direction: str, since: int | None, window_start: int | None = None) -> dict:
+    """Flights of the FIDS window, as changes since version `since` or in full.
+
+    Flights enter and leave the window as time passes without any board event, so
+    changes are only sent to a client whose `window_start` is still the current one.
+    The window moves in steps of FIDS_WINDOW_STEP and is wider than the board window
+    by one step; screens hide flights outside `past_hours`/`future_hours` of now.
+    """
+    current = board_version()
+    window = fids_window()
+    start = int(window[0].timestamp())
+    edges = {'past_hours': settings.BOARD_WINDOW_PAST_HOURS, 'future_hours': settings.BOARD_WINDOW_FUTURE_HOURS}
+
+    if since is not None and since <= current and window_start == start:
+        events = cache.get_many(board_change_keys(since, current))
+        changes, version = board_changes(since, current, events)
+        if changes is not None:
+            changed_ids = {change['id'] for change in changes}
+            flights = fids_rows(fids_queryset(direction, window).filter(pk__in=changed_ids)) if changed_ids else []
+            return {
+                'version': version,
+                'window': start,
+                **edges,
+                'full': False,
+                'flights': flights,
+                'removed': sorted(changed_ids - {row['id'] for row in flights}),
+            }
+
+    return {
+        'version': current,
+        'window': start,
+        **edges,
+        'full': True,
+        'flights': fids_rows(fids_queryset(direction, window)),
+        'removed': [],
+    }
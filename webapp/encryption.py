@@ -0,0 +1,77 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator
+
+from django.db.models import BinaryField, ExpressionWrapper, F, Model, QuerySet
+from django.utils.encoding import force_str
+from fernet_fields import EncryptedField
+
+DECRYPT_BATCH_SIZE = 2000
+DECRYPT_WORKERS = 4
+
+def encrypted_fields(model: type[Model]) -> list[str]:
+    return [field.name for field in model._meta.concrete_fields if isinstance(field, EncryptedField)]
+
+def defer_encrypted(queryset: QuerySet, related: list[str] | tuple = ()) -> QuerySet:
+    deferred = encrypted_fields(queryset.model)
+    for path in related:
+        model = queryset.model
+        for name in path.split('__'):
+            model = model._meta.get_field(name).related_model
+        deferred += [f'{path}__{name}' for name in encrypted_fields(model)]
+
+    return queryset.defer(*deferred) if deferred else queryset
+
+def _ciphertext_alias(name: str) -> str:
+    return f'{name}_ciphertext'
+
+def _decrypt_values(field: EncryptedField, values: list) -> list:
+    return [
+        None if value is None else field.to_python(force_str(field.fernet.decrypt(bytes(value))))
+        for value in values
+    ]
+
+def _decrypt_batch(model: type[Model], fields: list[str], batch: list[Model], executor: ThreadPoolExecutor | None, workers: int):
+    for name in fields:
+        field = model._meta.get_field(name)
+        values = [getattr(instance, _ciphertext_alias(name)) for instance in batch]
+
+        if executor:
+            size = -(-len(values) // workers)
+            chunks = [values[i:i + size] for i in range(0, len(values), size)]
+            decrypted = [value for chunk in executor.map(lambda chunk: _decrypt_values(field, chunk), chunks) for value in chunk]
+        else:
+            decrypted = _decrypt_values(field, values)
+
+        for instance, value in zip(batch, decrypted):
+            setattr(instance, name, value)
+
+def iter_decrypted(
+    queryset: QuerySet,
+    fields: list[str] | None = None,
+    batch_size: int = DECRYPT_BATCH_SIZE,
+    workers: int = 0,
+) -> Iterator[Model]:
+    """Iterates the queryset, decrypting `fields` a batch at a time instead of row by row."""
+    model = queryset.model
+    fields = encrypted_fields(model) if fields is None else fields
+    queryset = queryset.defer(*fields).annotate(**{
+        _ciphertext_alias(name): ExpressionWrapper(F(name), output_field=BinaryField())
+        for name in fields
+    })
+
+    executor = ThreadPoolExecutor(workers) if workers > 1 else None
+    try:
+        batch = []
+        for instance in queryset.iterator(chunk_size=batch_size):
+            batch.append(instance)
+            if len(batch) >= batch_size:
+                _decrypt_batch(model, fields, batch, executor, workers)
+                yield from batch
+                batch = []
+
+        if batch:
+            _decrypt_batch(model, fields, batch, executor, workers)
+            yield from batch
+    finally:
+        if executor:
+            executor.shutdown()
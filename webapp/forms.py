@@ -1,9 +1,13 @@
+import csv
+
 from django import forms
 from django.contrib.auth.forms import AuthenticationForm, UserCreationForm
 from django.forms import ValidationError
 from django.utils import timezone
 
 from dbapp.models import Airline, Airplane, Airport, Baggage, BoardingPass, CheckInDesk, CheckInDeskFlight, Flight, FlightTime, Gate, GateFlight, Passenger, Worker
+from webapp.autocomplete import AUTOCOMPLETES
+from webapp.widgets import AutocompleteSelect
 
 class LoginForm(AuthenticationForm):
     username = forms.CharField(
@@ -88,8 +92,9 @@ class WorkerEditForm(forms.ModelForm):
 
 class CheckInDeskForm(forms.ModelForm):
     worker = forms.ModelChoiceField(
-        queryset=Worker.objects.filter(groups__id__in=[1, 3]),
+        queryset=AUTOCOMPLETES['check_in_workers'].queryset.defer('phone'),
         required=False,
+        widget=AutocompleteSelect('check_in_workers', {'class': 'form-control'}),
         label='Сотрудник',
         help_text='Выберите сотрудника, который будет назначен на эту стойку'
     )
@@ -98,14 +103,14 @@ class CheckInDeskForm(forms.ModelForm):
         fields = ['number', 'worker', 'is_active']
         widgets = {
             'number': forms.TextInput({'class': 'form-control'}),
-            'worker': forms.Select({'class': 'form-control'}),
             'is_active': forms.CheckboxInput()
         }
 
 class GateForm(forms.ModelForm):
     worker = forms.ModelChoiceField(
-        queryset=Worker.objects.filter(groups__id__in=[2, 3]),
+        queryset=AUTOCOMPLETES['gate_workers'].queryset.defer('phone'),
         required=False,
+        widget=AutocompleteSelect('gate_workers', {'class': 'form-control'}),
         label='Сотрудник',
         help_text='Выберите сотрудника, который будет назначен на этот выход'
     )
@@ -114,7 +119,6 @@ class GateForm(forms.ModelForm):
         fields = ['number', 'worker', 'is_active']
         widgets = {
             'number': forms.TextInput({'class': 'form-control'}),
-            'worker': forms.Select({'class': 'form-control'}),
             'is_active': forms.CheckboxInput()
         }
 
@@ -166,7 +170,7 @@ class FlightForm(forms.ModelForm):
         ]
         widgets = {
             'number': forms.NumberInput(attrs={'class': 'form-control'}),
-            'airplane': forms.Select(attrs={'class': 'form-control'}),
+            'airplane': AutocompleteSelect('airplanes', attrs={'class': 'form-control'}),
             'planned_departure': forms.DateTimeInput(attrs={'class': 'form-control','type': 'datetime-local'}),
             'planned_arrival': forms.DateTimeInput(attrs={'class': 'form-control','type': 'datetime-local'}),
             'departure_airport': forms.Select(attrs={'class': 'form-control'}),
@@ -201,7 +205,8 @@ class FlightForm(forms.ModelForm):
 
 class CheckInDeskFlightForm(forms.ModelForm):
     flight = forms.ModelChoiceField(
-        queryset=Flight.objects.filter(flight_status__lt=9),
+        queryset=AUTOCOMPLETES['check_in_flights'].queryset,
+        widget=AutocompleteSelect('check_in_flights'),
         label='Рейс',
         help_text='Выберите рейс, который будет обслуживаться этой стойкой'
     )
@@ -215,7 +220,8 @@ class CheckInDeskFlightForm(forms.ModelForm):
 
 class GateFlightForm(forms.ModelForm):
     flight = forms.ModelChoiceField(
-        queryset=Flight.objects.exclude(flight_status__in=[1, 2, 9]),
+        queryset=AUTOCOMPLETES['gate_flights'].queryset,
+        widget=AutocompleteSelect('gate_flights'),
         label='Рейс',
         help_text='Выберите рейс, который будет обслуживаться этим посадочным выходом'
     )
@@ -310,7 +316,7 @@ class PassengerForm(forms.ModelForm):
             'last_name': forms.TextInput({'class': 'form-control'}),
             'middle_name': forms.TextInput({'class': 'form-control'}),
             'passport': forms.TextInput({'class': 'form-control'}),
-            'flight': forms.Select({'class': 'form-control'}),
+            'flight': AutocompleteSelect('flights', {'class': 'form-control'}),
             'check_in_passed': forms.CheckboxInput(),
             'boarding_passed': forms.CheckboxInput(),
             'is_removed': forms.CheckboxInput()
@@ -339,6 +345,12 @@ class BaseImportForm(forms.Form):
         label='CSV файл',
         help_text='Выберите CSV файл с данными'
     )
+    dry_run = forms.BooleanField(
+        label='Только проверить файл',
+        required=False,
+        widget=forms.CheckboxInput({'class': 'form-check-input'}),
+        help_text='Проверить все строки без записи в базу данных'
+    )
     
     def clean_csv_file(self, required_fields):
         csv_file = self.cleaned_data['csv_file']
@@ -346,14 +358,12 @@ class BaseImportForm(forms.Form):
             raise ValidationError('Файл должен быть в формате CSV')
         
         try:
-            csv_text = csv_file.read().decode('utf-8-sig')
-            lines = csv_text.strip().split('\n')
-            
-            if not lines:
+            header = csv_file.readline().decode('utf-8-sig')
+            if not header.strip():
                 raise ValidationError('CSV файл пуст')
-                
-            headers = [header.strip() for header in lines[0].split(';')]
-            
+
+            headers = [name.strip() for name in next(csv.reader([header], delimiter=';'))]
+
             missing_fields = [field for field in required_fields if field not in headers]
             if missing_fields:
                 raise ValidationError(
@@ -0,0 +1,98 @@
+import logging
+import os
+import threading
+import uuid
+
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.db import close_old_connections, connection, transaction
+from django.utils import timezone
+
+from dbapp.models import ImportJob, Worker
+from webapp.importing import IMPORTERS, ImportResult, format_report
+
+logger = logging.getLogger(__name__)
+
+def create_import_job(kind: str, upload: UploadedFile, user: Worker, dry_run: bool = False) -> ImportJob:
+    path = os.path.join(settings.IMPORT_DIR, f'{kind}_{uuid.uuid4().hex}.csv')
+    with open(path, 'wb') as file:
+        for chunk in upload.chunks():
+            file.write(chunk)
+
+    job = ImportJob.objects.create(kind=kind, dry_run=dry_run, file_path=path, created_by=user)
+    transaction.on_commit(lambda: start_import_job(job.pk))
+    return job
+
+def job_file_path(job: ImportJob) -> str:
+    """The job's upload path, refusing anything that does not resolve to a file inside IMPORT_DIR."""
+    root = os.path.realpath(settings.IMPORT_DIR)
+    path = os.path.realpath(job.file_path)
+    if os.path.dirname(path) != root:
+        raise ValueError(f'Файл импорта вне каталога {settings.IMPORT_DIR}')
+    return path
+
+def import_permission(kind: str) -> str:
+    return f'dbapp.add_{kind}'
+
+def start_import_job(job_id: int):
+    threading.Thread(target=run_import_job, args=(job_id,), name=f'import-job-{job_id}', daemon=True).start()
+
+def _save_checkpoint(job_id: int, result: ImportResult):
+    ImportJob.objects.filter(pk=job_id).update(
+        rows_done=result.rows_done,
+        imported=result.imported,
+        error_count=result.error_count,
+        report=result.report,
+    )
+
+def run_import_job(job_id: int):
+    """Runs the job from its last checkpoint, so a failed or interrupted job can simply be run again."""
+    close_old_connections()
+    job = ImportJob.objects.get(pk=job_id)
+    job.status = 'running'
+    job.message = ''
+    job.started_at = job.started_at or timezone.now()
+    job.finished_at = None
+    job.save(update_fields=['status', 'message', 'started_at', 'finished_at'])
+
+    try:
+        path = job_file_path(job)
+        importer = IMPORTERS[job.kind]()
+        result = ImportResult(imported=job.imported, line_num=job.rows_done + 1, report=job.report)
+        run = importer.validate if job.dry_run else importer.run
+        with open(path, 'rb') as file:
+            run(file, result=result, checkpoint=lambda result: _save_checkpoint(job_id, result))
+
+        job.refresh_from_db()
+        job.status = 'success'
+        os.remove(path)
+    except Exception as e:
+        logger.exception('Import job %s failed', job_id)
+        job.refresh_from_db()
+        job.status = 'error'
+        job.message = str(e)
+    finally:
+        job.finished_at = timezone.now()
+        job.save(update_fields=['status', 'message', 'finished_at'])
+        connection.close()
+
+def _resumable(job: ImportJob) -> bool:
+    try:
+        return job.status == 'error' and job.kind in IMPORTERS and os.path.isfile(job_file_path(job))
+    except ValueError:
+        return False
+
+def import_job_state(job: ImportJob) -> dict:
+    return {
+        'id': job.pk,
+        'dry_run': job.dry_run,
+        'status': job.status,
+        'status_display': job.get_status_display(), # type: ignore
+        'rows_done': job.rows_done,
+        'imported': job.imported,
+        'error_count': job.error_count,
+        'report': format_report(job.report),
+        'message': job.message,
+        'finished': job.status in ('success', 'error'),
+        'resumable': _resumable(job),
+    }
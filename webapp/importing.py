@@ -0,0 +1,756 @@
+import csv
+import io
+import multiprocessing
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from itertools import repeat
+from typing import IO, Callable, Iterable, Iterator
+
+import django
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import Group
+from django.core.exceptions import ValidationError
+from django.db import DataError, IntegrityError, connection, transaction
+from django.db.models import Model, Q, QuerySet
+
+from dbapp.models import Airline, Airplane, Airport, BoardFlight, Flight, FlightStatus, Passenger, Worker, blind_index
+from webapp.board import invalidate_board
+from webapp.versions import invalidate_auth, invalidate_table
+
+IMPORT_BATCH_SIZE = 1000
+IMPORT_VALIDATE_BATCH_SIZE = 10000
+IMPORT_LOOKUP_CHUNK = 1000
+IMPORT_MERGE_MAX_PARAMS = 2000
+IMPORT_WORKERS = os.cpu_count() or 1
+IMPORT_HASH_INLINE_MAX = 8
+IMPORT_REPORT_GROUPS = 100
+IMPORT_REPORT_LINES = 20
+WORKER_DEFAULT_PASSWORD = 'supersecretpassword'
+
+_INVISIBLE = str.maketrans('', '', '\ufeff\u200b')
+
+class RowError(Exception):
+    pass
+
+class ImportResult:
+    """Import counters and an error report that groups errors by message, keeping the first lines of each."""
+
+    def __init__(self, imported: int = 0, line_num: int = 1, report: dict[str, dict] | None = None):
+        self.imported = imported
+        self.line_num = line_num
+        self.report = report or {}
+
+    @property
+    def rows_done(self) -> int:
+        return self.line_num - 1
+
+    @property
+    def error_count(self) -> int:
+        return sum(group['count'] for group in self.report.values())
+
+    def error(self, line_num: int | str, message: str):
+        if message not in self.report and len(self.report) >= IMPORT_REPORT_GROUPS:
+            message = 'Прочие ошибки'
+        group = self.report.setdefault(message, {'count': 0, 'lines': []})
+        group['count'] += 1
+        if len(group['lines']) < IMPORT_REPORT_LINES:
+            group['lines'].append(line_num)
+
+def _format_lines(lines: list[int | str], count: int) -> str:
+    ranges = []
+    for line in lines:
+        if ranges and isinstance(line, int) and isinstance(ranges[-1][1], int) and line == ranges[-1][1] + 1:
+            ranges[-1][1] = line
+        else:
+            ranges.append([line, line])
+
+    text = ', '.join(str(first) if first == last else f'{first}–{last}' for first, last in ranges)
+    return f'{text}, …' if count > len(lines) else text
+
+def format_report(report: dict[str, dict]) -> list[dict]:
+    return [
+        {'message': message, 'count': group['count'], 'lines': _format_lines(group['lines'], group['count'])}
+        for message, group in sorted(report.items(), key=lambda item: -item[1]['count'])
+    ]
+
+def _clean(value: str | None) -> str:
+    return (value or '').translate(_INVISIBLE).strip()
+
+def read_rows(file: IO[bytes], result: ImportResult, start_line: int = 1) -> Iterator[tuple[int, dict[str, str]]]:
+    stream = io.TextIOWrapper(file, encoding='utf-8-sig', newline='')
+    try:
+        reader = csv.DictReader(stream, delimiter=';')
+        reader.fieldnames = [_clean(name) for name in reader.fieldnames or []]
+
+        for row in reader:
+            if reader.line_num <= start_line:
+                continue
+            if None in row or None in row.values():
+                result.error(reader.line_num, 'Неверное количество колонок')
+                continue
+
+            row = {key: _clean(value) for key, value in row.items()}
+            if any(row.values()):
+                yield reader.line_num, row
+    finally:
+        stream.detach()
+
+def _batches(rows: Iterable, size: int) -> Iterator[list]:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def parse_bool(value: str, default: bool = False) -> bool:
+    return value.lower() == 'true' if value else default
+
+def parse_datetime(value: str, label: str) -> datetime | None:
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, '%d.%m.%Y %H:%M')
+    except ValueError:
+        raise RowError(f"Неверный формат даты {label} '{value}'. Ожидается: ДД.ММ.ГГГГ ЧЧ:ММ")
+
+def _process_pool(workers: int) -> ProcessPoolExecutor:
+    # spawn, not fork: imports run in a thread of the web process
+    return ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('spawn'), initializer=django.setup)
+
+def _split(items: list, parts: int) -> list[list]:
+    size = -(-len(items) // parts)
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+def hash_passwords(passwords: list[str], executor: ProcessPoolExecutor | None = None) -> list[str]:
+    """Hashes the passwords across `executor` if given, since every hash is pure CPU work."""
+    if executor is None:
+        return [make_password(password) for password in passwords]
+    return list(executor.map(make_password, passwords, chunksize=max(1, len(passwords) // (IMPORT_WORKERS * 4))))
+
+def _validate_rows(importer: type['Importer'], rows: list[tuple[int, dict[str, str]]]) -> list[tuple[int, list[str]]]:
+    return [(line_num, errors) for line_num, row in rows if (errors := importer.validate_row(row))]
+
+class Lookup:
+    """Resolves the values of `columns` to instances with one IN query per batch, remembering earlier batches.
+
+    A value that matches several instances is reported as a row error with the `ambiguous` message.
+    """
+
+    def __init__(self, queryset: QuerySet, field: str, *columns: str, ambiguous: str = "Найдено несколько записей '{value}'"):
+        self.queryset = queryset
+        self.field = field
+        self.columns = columns
+        self.ambiguous = ambiguous
+        self.cache = {}
+        self.duplicates = set()
+
+    def prefetch(self, rows: list[tuple[int, dict[str, str]]]):
+        missing = list({row[column] for _, row in rows for column in self.columns if row.get(column)} - self.cache.keys())
+        self.cache.update(dict.fromkeys(missing))
+
+        for i in range(0, len(missing), IMPORT_LOOKUP_CHUNK):
+            chunk = missing[i:i + IMPORT_LOOKUP_CHUNK]
+            for instance in self.queryset.filter(**{f'{self.field}__in': chunk}):
+                key = getattr(instance, self.field)
+                if self.cache.get(key) is not None:
+                    self.duplicates.add(key)
+                self.cache[key] = instance
+
+    def get(self, value: str) -> Model | None:
+        if value in self.duplicates:
+            raise RowError(self.ambiguous.format(value=value))
+        return self.cache.get(value)
+
+class FlightLookup(Lookup):
+    """Resolves 'SU 123' (as written by the export) or a bare flight number when it is unambiguous."""
+
+    def __init__(self, column: str):
+        super().__init__(Flight.objects.all(), 'number', column)
+        self.by_number: dict[int, list[Flight]] = {}
+
+    @staticmethod
+    def parse(value: str) -> tuple[str, int] | None:
+        parts = value.split()
+        if len(parts) == 1 and parts[0].isdigit():
+            return '', int(parts[0])
+        if len(parts) == 2 and parts[1].isdigit():
+            return parts[0].upper(), int(parts[1])
+        return None
+
+    def prefetch(self, rows):
+        parsed = (self.parse(row[column]) for _, row in rows for column in self.columns if row.get(column))
+        missing = list({key[1] for key in parsed if key} - self.by_number.keys())
+
+        for number in missing:
+            self.by_number[number] = []
+        for i in range(0, len(missing), IMPORT_LOOKUP_CHUNK):
+            for flight in self.queryset.filter(number__in=missing[i:i + IMPORT_LOOKUP_CHUNK]):
+                self.by_number[flight.number].append(flight)
+
+    def get(self, value):
+        key = self.parse(value)
+        if key is None:
+            return None
+
+        code, number = key
+        flights = [flight for flight in self.by_number.get(number, []) if not code or flight.airline_code.upper() == code]
+        if len(flights) > 1 and code:
+            raise RowError(f"Найдено несколько рейсов '{value}'")
+        if len(flights) > 1:
+            raise RowError(f"Рейс '{value}' неоднозначен, укажите код авиакомпании, например {flights[0]}")
+        return flights[0] if flights else None
+
+class Importer:
+    model: type[Model]
+    noun = 'записей'
+    required_fields: list[str] = []
+    clean_fields: list[str] = []
+    key_field: str | None = None
+    update_fields: list[str] = []
+    upsert = False
+    board = False
+
+    def __init__(self):
+        self.lookups = self.get_lookups()
+
+    def get_lookups(self) -> dict[str, Lookup]:
+        return {}
+
+    @classmethod
+    def validate_row(cls, row: dict[str, str]) -> list[str]:
+        """Checks a row without the database, with the model field validators of `clean_fields`."""
+        if not all(row.get(field) for field in cls.required_fields):
+            return ['Отсутствуют обязательные поля']
+
+        errors = []
+        for name in cls.clean_fields:
+            if not row.get(name):
+                continue
+            field = cls.model._meta.get_field(name)
+            try:
+                field.clean(row[name], None) # type: ignore
+            except ValidationError as e:
+                errors.append(f"{field.verbose_name}: {' '.join(e.messages)}")
+        return errors
+
+    def build(self, row: dict[str, str]) -> Model:
+        raise NotImplementedError
+
+    def check_batch(self, items: list[tuple[int, Model]], result: ImportResult) -> list[tuple[int, Model]]:
+        return items
+
+    def after_batch(self, created: list[Model], updated: list[Model]):
+        pass
+
+    def close(self):
+        pass
+
+    def build_batch(self, rows: list[tuple[int, dict[str, str]]], result: ImportResult) -> list[tuple[int, Model]]:
+        valid = []
+        for line_num, row in rows:
+            errors = self.validate_row(row)
+            for message in errors:
+                result.error(line_num, message)
+            if not errors:
+                valid.append((line_num, row))
+        return self.build_valid(valid, result)
+
+    def build_valid(self, rows: list[tuple[int, dict[str, str]]], result: ImportResult) -> list[tuple[int, Model]]:
+        """Builds rows that already passed validate_row."""
+        for lookup in self.lookups.values():
+            lookup.prefetch(rows)
+
+        items = []
+        for line_num, row in rows:
+            try:
+                items.append((line_num, self.build(row)))
+            except (RowError, ValueError) as e:
+                result.error(line_num, str(e))
+        return self.check_batch(items, result)
+
+    def split_existing(self, items: list[tuple[int, Model]]) -> tuple[list[Model], list[Model]]:
+        if not self.key_field:
+            return [instance for _, instance in items], []
+
+        by_key = {getattr(instance, self.key_field): instance for _, instance in items}
+        existing = dict(
+            self.model._default_manager
+            .filter(**{f'{self.key_field}__in': list(by_key)})
+            .values_list(self.key_field, 'pk')
+        )
+
+        created, updated = [], []
+        for key, instance in by_key.items():
+            if key in existing:
+                instance.pk = existing[key]
+                updated.append(instance)
+            else:
+                created.append(instance)
+        return created, updated
+
+    def can_upsert(self) -> bool:
+        # Backends with neither ON CONFLICT nor MERGE use the lookup path of write_batch
+        features = connection.features
+        return bool(self.upsert and self.key_field and (
+            features.supports_update_conflicts_with_target or features.supports_update_conflicts or connection.vendor == 'microsoft'
+        ))
+
+    def upsert_batch(self, items: list[tuple[int, Model]]) -> int:
+        instances = list({getattr(instance, self.key_field): instance for _, instance in items}.values()) # type: ignore
+        if connection.vendor == 'microsoft':
+            self.merge_batch(instances, [self.key_field]) # type: ignore
+        else:
+            self.model._default_manager.bulk_create(
+                instances,
+                batch_size=IMPORT_BATCH_SIZE,
+                update_conflicts=True,
+                # MySQL resolves the conflict on any unique key and accepts no target
+                unique_fields=[self.key_field] if connection.features.supports_update_conflicts_with_target else None,
+                update_fields=self.update_fields,
+            )
+        # An upsert does not tell new rows from existing ones, so hooks see them all as updated
+        self.after_batch([], instances)
+        return len(instances)
+
+    def merge_batch(self, instances: list[Model], key_fields: list[str]):
+        """Upserts with one MERGE per chunk on SQL Server, which has no ON CONFLICT,
+        matching rows on all of `key_fields`.
+
+        Chunks stay under the limit of 2100 parameters per statement.
+        """
+        opts = self.model._meta
+        quote = connection.ops.quote_name
+        fields = [field for field in opts.concrete_fields if not field.primary_key]
+        columns = ', '.join(quote(field.column) for field in fields)
+        match = ' AND '.join(
+            f'target.{column} = source.{column}'
+            for column in (quote(opts.get_field(name).column) for name in key_fields) # type: ignore
+        )
+        updates = ', '.join(
+            f'target.{column} = source.{column}'
+            for column in (quote(opts.get_field(name).column) for name in self.update_fields) # type: ignore
+        )
+        row = f"({', '.join(['%s'] * len(fields))})"
+        chunk_size = max(1, IMPORT_MERGE_MAX_PARAMS // len(fields))
+
+        with connection.cursor() as cursor:
+            for start in range(0, len(instances), chunk_size):
+                chunk = instances[start:start + chunk_size]
+                cursor.execute(
+                    f'MERGE INTO {quote(opts.db_table)} WITH (HOLDLOCK) AS target '
+                    f"USING (VALUES {', '.join([row] * len(chunk))}) AS source ({columns}) "
+                    f'ON {match} '
+                    f'WHEN MATCHED THEN UPDATE SET {updates} '
+                    f"WHEN NOT MATCHED THEN INSERT ({columns}) VALUES ({', '.join(f'source.{quote(field.column)}' for field in fields)});",
+                    [field.get_db_prep_save(field.pre_save(instance, True), connection) for instance in chunk for field in fields],
+                )
+
+    def write_batch(self, created: list[Model], updated: list[Model]) -> int:
+        manager = self.model._default_manager
+        if created:
+            manager.bulk_create(created, batch_size=IMPORT_BATCH_SIZE)
+        if updated:
+            manager.bulk_update(updated, self.update_fields, batch_size=IMPORT_BATCH_SIZE)
+        self.after_batch(created, updated)
+        return len(created) + len(updated)
+
+    def write_items(self, items: list[tuple[int, Model]]) -> int:
+        """Writes the items and returns how many rows were written; rows with the same key count once."""
+        if self.can_upsert():
+            return self.upsert_batch(items)
+        return self.write_batch(*self.split_existing(items))
+
+    def write_rows(self, items: list[tuple[int, Model]], result: ImportResult):
+        """Writes the items one by one in savepoints, reporting the rows the database rejects."""
+        for line_num, instance in items:
+            # A failed bulk write may have left primary keys on the instances
+            instance.pk = None
+            instance._state.adding = True
+            try:
+                with transaction.atomic():
+                    result.imported += self.write_items([(line_num, instance)])
+            except (DataError, IntegrityError) as e:
+                result.error(line_num, str(e))
+
+    def run(
+        self,
+        file: IO[bytes],
+        batch_size: int = IMPORT_BATCH_SIZE,
+        result: ImportResult | None = None,
+        checkpoint: Callable[[ImportResult], None] | None = None,
+    ) -> ImportResult:
+        """Imports the file batch by batch, committing every batch in its own transaction.
+        A batch the database rejects is written again row by row, so only the offending rows fail.
+        A row repeating the key of an earlier row is reported and skipped, as in validate().
+        Any other database error stops the run before the checkpoint, so a resume starts from
+        the first row that was not written.
+
+        Rows up to `result.line_num` are skipped, so passing the result of an interrupted
+        run resumes it. `checkpoint` is called inside each batch transaction and can
+        persist the result together with the rows it describes.
+        """
+        result = result or ImportResult()
+        seen = set()
+
+        try:
+            for rows in _batches(read_rows(file, result, result.line_num), batch_size):
+                items = self.check_duplicates(self.build_batch(rows, result), result, seen)
+                imported = result.imported
+
+                try:
+                    with transaction.atomic():
+                        if items:
+                            result.imported += self.write_items(items)
+                        result.line_num = rows[-1][0]
+                        if checkpoint:
+                            checkpoint(result)
+                except (DataError, IntegrityError):
+                    result.imported = imported
+                    with transaction.atomic():
+                        self.write_rows(items, result)
+                        result.line_num = rows[-1][0]
+                        if checkpoint:
+                            checkpoint(result)
+
+                invalidate_table(self.model)
+        finally:
+            self.close()
+            if self.board:
+                invalidate_board(self.model, None)
+
+        return result
+
+    def check_duplicates(self, items: list[tuple[int, Model]], result: ImportResult, seen: set) -> list[tuple[int, Model]]:
+        if not self.key_field:
+            return items
+
+        field = self.model._meta.get_field(self.key_field)
+        unique = []
+        for line_num, instance in items:
+            key = getattr(instance, self.key_field)
+            if key in seen:
+                result.error(line_num, f'{field.verbose_name} повторяется в файле')
+                continue
+            seen.add(key)
+            unique.append((line_num, instance))
+        return unique
+
+    def validate(
+        self,
+        file: IO[bytes],
+        batch_size: int = IMPORT_VALIDATE_BATCH_SIZE,
+        result: ImportResult | None = None,
+        checkpoint: Callable[[ImportResult], None] | None = None,
+    ) -> ImportResult:
+        """Checks the file the way run() would without writing anything; `imported` counts the rows that would be written.
+
+        Field checks need no database, so once the file is larger than one batch they are
+        spread over a process pool; lookups and duplicate checks run here, a batch at a time.
+        """
+        result = result or ImportResult()
+        pool = None
+        seen = set()
+
+        try:
+            for rows in _batches(read_rows(file, result, result.line_num), batch_size):
+                if pool is None and len(rows) == batch_size and IMPORT_WORKERS > 1:
+                    pool = _process_pool(IMPORT_WORKERS)
+
+                if pool:
+                    invalid = [row for chunk in pool.map(_validate_rows, repeat(type(self)), _split(rows, IMPORT_WORKERS)) for row in chunk]
+                else:
+                    invalid = _validate_rows(type(self), rows)
+
+                for line_num, errors in invalid:
+                    for message in errors:
+                        result.error(line_num, message)
+
+                failed = {line_num for line_num, _ in invalid}
+                items = self.build_valid([row for row in rows if row[0] not in failed], result)
+                result.imported += len(self.check_duplicates(items, result, seen))
+                result.line_num = rows[-1][0]
+                if checkpoint:
+                    checkpoint(result)
+        finally:
+            if pool:
+                pool.shutdown()
+
+        return result
+
+class AirlineImporter(Importer):
+    model = Airline
+    noun = 'авиакомпаний'
+    required_fields = ['name', 'IATA_code', 'ICAO_code']
+    key_field = 'IATA_code'
+    clean_fields = ['name', 'IATA_code', 'ICAO_code', 'contact_person', 'contact_phone', 'contact_email']
+    update_fields = ['name', 'ICAO_code', 'contact_person', 'contact_phone', 'contact_email']
+    upsert = True
+
+    def build(self, row):
+        return Airline(
+            name=row['name'],
+            IATA_code=row['IATA_code'],
+            ICAO_code=row['ICAO_code'],
+            contact_person=row.get('contact_person', ''),
+            contact_phone=row.get('contact_phone', ''),
+            contact_email=row.get('contact_email', ''),
+        )
+
+class AirportImporter(Importer):
+    model = Airport
+    noun = 'аэропортов'
+    required_fields = ['name', 'IATA_code', 'ICAO_code']
+    clean_fields = ['name', 'IATA_code', 'ICAO_code']
+    key_field = 'IATA_code'
+    update_fields = ['name', 'ICAO_code']
+    upsert = True
+    board = True
+
+    def build(self, row):
+        return Airport(name=row['name'], IATA_code=row['IATA_code'], ICAO_code=row['ICAO_code'])
+
+    def after_batch(self, created, updated):
+        if updated:
+            codes = [airport.IATA_code for airport in updated]
+            BoardFlight.refresh(Flight.objects.filter(
+                Q(departure_airport__IATA_code__in=codes) | Q(arrival_airport__IATA_code__in=codes)
+            ))
+
+class AirplaneImporter(Importer):
+    model = Airplane
+    noun = 'самолетов'
+    required_fields = ['tail_number', 'name', 'airline', 'layout', 'rows']
+    clean_fields = ['tail_number', 'name', 'layout', 'rows']
+    key_field = 'tail_number'
+    update_fields = ['name', 'airline', 'layout', 'rows']
+    board = True
+
+    def get_lookups(self):
+        return {'airline': Lookup(
+            Airline.objects.all(), 'name', 'airline',
+            ambiguous="Найдено несколько авиакомпаний '{value}', переименуйте их, чтобы названия различались",
+        )}
+
+    def build(self, row):
+        airline = self.lookups['airline'].get(row['airline'])
+        if airline is None:
+            raise RowError(f"Авиакомпания '{row['airline']}' не найдена")
+
+        return Airplane(
+            tail_number=row['tail_number'],
+            name=row['name'],
+            airline=airline,
+            layout=row['layout'],
+            rows=int(row['rows']),
+        )
+
+    def after_batch(self, created, updated):
+        if updated:
+            flights = Flight.objects.filter(airplane__in=updated)
+            Flight.refresh_airline_codes(flights)
+            BoardFlight.refresh(flights)
+
+class FlightImporter(Importer):
+    model = Flight
+    noun = 'рейсов'
+    required_fields = ['number', 'airplane', 'departure_airport', 'arrival_airport', 'flight_status']
+    clean_fields = ['number']
+    board = True
+
+    def get_lookups(self):
+        return {
+            'airplane': Lookup(Airplane.objects.select_related('airline'), 'tail_number', 'airplane'),
+            'airport': Lookup(Airport.objects.all(), 'IATA_code', 'departure_airport', 'arrival_airport'),
+            'flight_status': Lookup(FlightStatus.objects.all(), 'name', 'flight_status'),
+        }
+
+    def build(self, row):
+        airplane = self.lookups['airplane'].get(row['airplane'])
+        if airplane is None:
+            raise RowError(f"Самолет '{row['airplane']}' не найден")
+
+        departure_airport = self.lookups['airport'].get(row['departure_airport'])
+        if departure_airport is None:
+            raise RowError(f"Аэропорт вылета '{row['departure_airport']}' не найден")
+
+        arrival_airport = self.lookups['airport'].get(row['arrival_airport'])
+        if arrival_airport is None:
+            raise RowError(f"Аэропорт прибытия '{row['arrival_airport']}' не найден")
+
+        flight_status = self.lookups['flight_status'].get(row['flight_status'])
+        if flight_status is None:
+            raise RowError(f"Статус рейса '{row['flight_status']}' не найден")
+
+        planned_departure = parse_datetime(row.get('planned_departure', ''), 'вылета')
+        planned_arrival = parse_datetime(row.get('planned_arrival', ''), 'прибытия')
+        if planned_departure and planned_arrival and planned_arrival < planned_departure:
+            raise RowError('Дата прибытия не может быть раньше даты вылета')
+
+        return Flight(
+            number=int(row['number']),
+            airplane=airplane,
+            airline_code=airplane.airline.IATA_code,
+            planned_departure=planned_departure,
+            planned_arrival=planned_arrival,
+            departure_airport=departure_airport,
+            arrival_airport=arrival_airport,
+            flight_status=flight_status,
+        )
+
+    def after_batch(self, created, updated):
+        BoardFlight.refresh(Flight.objects.filter(boardflight__isnull=True))
+
+class PassengerImporter(Importer):
+    model = Passenger
+    noun = 'пассажиров'
+    required_fields = ['first_name', 'last_name', 'passport', 'flight']
+    clean_fields = ['first_name', 'last_name', 'middle_name', 'passport']
+
+    def __init__(self):
+        super().__init__()
+        self.seen_passports = set()
+
+    def get_lookups(self):
+        return {'flight': FlightLookup('flight')}
+
+    def build(self, row):
+        flight = self.lookups['flight'].get(row['flight'])
+        if flight is None:
+            raise RowError(f"Рейс '{row['flight']}' не найден")
+
+        return Passenger(
+            first_name=row['first_name'],
+            last_name=row['last_name'],
+            middle_name=row.get('middle_name', ''),
+            passport=row['passport'],
+            passport_hash=blind_index(row['passport']),
+            flight=flight,
+            check_in_passed=parse_bool(row.get('check_in_passed', '')),
+            boarding_passed=parse_bool(row.get('boarding_passed', '')),
+            is_removed=parse_bool(row.get('is_removed', '')),
+        )
+
+    def check_batch(self, items, result):
+        existing = set(
+            Passenger.objects.filter(
+                passport_hash__in={passenger.passport_hash for _, passenger in items},
+                flight_id__in={passenger.flight_id for _, passenger in items}, # type: ignore
+            ).values_list('passport_hash', 'flight_id')
+        )
+
+        unique = []
+        for line_num, passenger in items:
+            key = (passenger.passport_hash, passenger.flight_id) # type: ignore
+            if key in existing or key in self.seen_passports:
+                result.error(line_num, f'Пассажир с таким паспортом уже есть на рейсе {passenger.flight}')
+                continue
+            self.seen_passports.add(key)
+            unique.append((line_num, passenger))
+        return unique
+
+class WorkerImporter(Importer):
+    model = Worker
+    noun = 'сотрудников'
+    required_fields = ['username', 'last_name', 'first_name', 'email']
+    clean_fields = ['username', 'last_name', 'first_name', 'email', 'middle_name', 'phone']
+    key_field = 'username'
+    update_fields = ['middle_name', 'password']
+
+    def __init__(self):
+        super().__init__()
+        self.groups = {group.name: group for group in Group.objects.all()}
+        self.pool: ProcessPoolExecutor | None = None
+
+    def password_pool(self, count: int) -> ProcessPoolExecutor | None:
+        # Spawning the workers takes seconds, so a few passwords are hashed here and the pool is kept for the whole run
+        if count <= IMPORT_HASH_INLINE_MAX or IMPORT_WORKERS < 2:
+            return None
+        if self.pool is None:
+            self.pool = _process_pool(IMPORT_WORKERS)
+        return self.pool
+
+    def close(self):
+        if self.pool:
+            self.pool.shutdown()
+            self.pool = None
+
+    def build(self, row):
+        phone = re.sub(r'\D', '', row.get('phone', ''))
+        worker = Worker(
+            username=row['username'],
+            last_name=row['last_name'],
+            first_name=row['first_name'],
+            email=row['email'],
+            middle_name=row.get('middle_name', ''),
+            phone=phone,
+            phone_hash=blind_index(phone),
+            is_active=parse_bool(row.get('is_active', ''), True),
+            is_staff=parse_bool(row.get('is_staff', '')),
+        )
+        worker.import_password = row.get('password') or None # type: ignore
+        worker.import_groups = [ # type: ignore
+            self.groups[name.strip()] for name in row['groups'].split(',') if name.strip() in self.groups
+        ] if row.get('groups') else None
+        return worker
+
+    def split_existing(self, items):
+        by_username = {worker.username: worker for _, worker in items}
+        existing = Worker.objects.in_bulk(list(by_username), field_name='username')
+
+        created, updated = [], []
+        for username, worker in by_username.items():
+            current = existing.get(username)
+            if current is None:
+                worker.import_password = worker.import_password or WORKER_DEFAULT_PASSWORD # type: ignore
+                created.append(worker)
+                continue
+
+            current.middle_name = worker.middle_name
+            current.import_phone = worker.phone if worker.phone and worker.phone != current.phone else None # type: ignore
+            current.import_password = worker.import_password # type: ignore
+            current.import_groups = worker.import_groups # type: ignore
+            updated.append(current)
+        return created, updated
+
+    def write_batch(self, created, updated):
+        workers = [worker for worker in created + updated if worker.import_password]
+        passwords = [worker.import_password for worker in workers]
+        for worker, password in zip(workers, hash_passwords(passwords, self.password_pool(len(passwords)))):
+            worker.password = password
+        written = super().write_batch(created, updated)
+
+        # bulk_update would hand the encrypted field a CASE expression, so phones are updated one by one
+        for worker in updated:
+            if worker.import_phone:
+                Worker.objects.filter(pk=worker.pk).update(phone=worker.import_phone, phone_hash=blind_index(worker.import_phone))
+        return written
+
+    def after_batch(self, created, updated):
+        # Bulk writes send no signals, so the cached permissions are invalidated here
+        invalidate_auth()
+
+        workers = [worker for worker in created + updated if worker.import_groups is not None]
+        if not workers:
+            return
+
+        ids = dict(Worker.objects.filter(username__in=[worker.username for worker in workers]).values_list('username', 'pk'))
+        through = Worker.groups.through
+        through.objects.filter(worker_id__in=ids.values()).delete()
+        through.objects.bulk_create([
+            through(worker_id=ids[worker.username], group_id=group.pk)
+            for worker in workers for group in worker.import_groups
+        ])
+
+IMPORTERS: dict[str, type[Importer]] = {
+    'worker': WorkerImporter,
+    'airline': AirlineImporter,
+    'airport': AirportImporter,
+    'airplane': AirplaneImporter,
+    'flight': FlightImporter,
+    'passenger': PassengerImporter,
+}
@@ -0,0 +1,199 @@
+import base64
+import json
+from datetime import date, time
+from typing import Callable
+from urllib.parse import urlencode
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F, Model, Q, QuerySet
+from django.http import QueryDict
+
+from webapp.encryption import defer_encrypted
+
+LIST_PAGE_SIZE = 30
+LIST_MAX_PAGE_SIZE = 200
+
+def words_filter(*lookups: str) -> Callable[[str], Q]:
+    def build(value: str) -> Q:
+        query = Q()
+        for word in value.split():
+            word_query = Q()
+            for lookup in lookups:
+                word_query |= Q(**{f'{lookup}__icontains': word})
+            query &= word_query
+        return query
+    return build
+
+def prefix_filter(*fields: str) -> Callable[[str], Q]:
+    # n-th word matches the start of the n-th field, so a composite index on
+    # the fields serves the lookup as a range scan
+    def build(value: str) -> Q:
+        query = Q()
+        for field, word in zip(fields, value.split()):
+            query &= Q(**{f'{field}__istartswith': word})
+        return query
+    return build
+
+def choice_filter(lookup: str, choices: dict) -> Callable[[str], Q | None]:
+    def build(value: str) -> Q | None:
+        if value not in choices:
+            return None
+        return Q(**{lookup: choices[value]})
+    return build
+
+def _resolve_path(model: type[Model], path: str):
+    field = None
+    single = True
+    for name in path.split('__'):
+        field = model._meta.get_field(name)
+        if field.many_to_many or field.one_to_many:
+            single = False
+        model = field.related_model or model
+    return field, single
+
+def related_plan(model: type[Model], paths: list[str]) -> tuple[list[str], list[str]]:
+    select, prefetch = [], []
+    for path in paths:
+        _, single = _resolve_path(model, path)
+        (select if single else prefetch).append(path)
+    return select, prefetch
+
+class Listing:
+    def __init__(
+        self,
+        model: type[Model],
+        sorts: dict[str, str],
+        default_sort: str,
+        filters: dict[str, str | Callable[[str], Q | None]] | None = None,
+        related: list[str] | None = None,
+        page_size: int = LIST_PAGE_SIZE,
+    ):
+        self.model = model
+        self.sorts = sorts
+        self.default_sort = default_sort
+        self.filters = filters or {}
+        self.select_related, self.prefetch_related = related_plan(model, related or [])
+        self.page_size = page_size
+
+    def sort_options(self) -> list[tuple[str, str]]:
+        options = []
+        for key, label in self.sorts.items():
+            options.append((key, f'{label} ↑'))
+            options.append((f'-{key}', f'{label} ↓'))
+        return options
+
+    def clean_filters(self, params: QueryDict) -> dict[str, str]:
+        return {name: params.get(name, '').strip() for name in self.filters}
+
+    def clean_sort(self, params: QueryDict) -> str:
+        sort = params.get('sort', self.default_sort)
+        if sort.lstrip('-') not in self.sorts:
+            sort = self.default_sort
+        return sort
+
+    def clean_page_size(self, params: QueryDict) -> int:
+        try:
+            size = int(params.get('page_size', self.page_size))
+        except ValueError:
+            size = self.page_size
+        return max(1, min(size, LIST_MAX_PAGE_SIZE))
+
+    def filter(self, queryset: QuerySet, filters: dict[str, str]) -> QuerySet:
+        for name, value in filters.items():
+            if not value:
+                continue
+            lookup = self.filters[name]
+            query = lookup(value) if callable(lookup) else Q(**{lookup: value})
+            if query is not None:
+                queryset = queryset.filter(query)
+        return queryset
+
+    def encode_cursor(self, value, pk) -> str:
+        if isinstance(value, (date, time)):
+            value = value.isoformat()
+        data = json.dumps([value, pk], cls=DjangoJSONEncoder, separators=(',', ':'))
+        return base64.urlsafe_b64encode(data.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, cursor: str | None, path: str):
+        if not cursor:
+            return None
+        try:
+            value, pk = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+            field, _ = _resolve_path(self.model, path)
+            return (None if value is None else field.to_python(value)), int(pk)
+        except Exception:
+            return None
+
+    def _keyset(self, path: str, nullable: bool, cursor: tuple, descending: bool, nulls_last: bool) -> Q:
+        value, pk = cursor
+        compare = 'lt' if descending else 'gt'
+        after_pk = Q(**{f'pk__{compare}': pk})
+
+        if value is None:
+            query = Q(**{f'{path}__isnull': True}) & after_pk
+            return query if nulls_last else query | Q(**{f'{path}__isnull': False})
+
+        query = Q(**{f'{path}__{compare}': value}) | (Q(**{path: value}) & after_pk)
+        if nullable and nulls_last:
+            query |= Q(**{f'{path}__isnull': True})
+        return query
+
+    def _ordering(self, path: str, descending: bool, nulls_last: bool) -> list:
+        nulls = {'nulls_last': True} if nulls_last else {'nulls_first': True}
+        if descending:
+            return [F(path).desc(**nulls), '-pk']
+        return [F(path).asc(**nulls), 'pk']
+
+    def page(self, params: QueryDict, queryset: QuerySet | None = None) -> dict:
+        if queryset is None:
+            queryset = self.model._default_manager.all()
+        queryset = defer_encrypted(queryset, self.select_related)
+        if self.select_related:
+            queryset = queryset.select_related(*self.select_related)
+        if self.prefetch_related:
+            queryset = queryset.prefetch_related(*self.prefetch_related)
+
+        filters = self.clean_filters(params)
+        sort = self.clean_sort(params)
+        size = self.clean_page_size(params)
+        queryset = self.filter(queryset, filters)
+
+        path = sort.lstrip('-')
+        descending = sort.startswith('-')
+        field, _ = _resolve_path(self.model, path)
+        nullable = bool(field.null) or '__' in path
+        queryset = queryset.annotate(list_sort_value=F(path))
+
+        before = self.decode_cursor(params.get('before'), path)
+        after = None if before else self.decode_cursor(params.get('after'), path)
+
+        if before:
+            rows = list(
+                queryset.filter(self._keyset(path, nullable, before, not descending, False))
+                .order_by(*self._ordering(path, not descending, False))[:size + 1]
+            )
+            has_previous, has_next = len(rows) > size, True
+            rows = rows[:size][::-1]
+        else:
+            if after:
+                queryset = queryset.filter(self._keyset(path, nullable, after, descending, True))
+            rows = list(queryset.order_by(*self._ordering(path, descending, True))[:size + 1])
+            has_previous, has_next = after is not None, len(rows) > size
+            rows = rows[:size]
+
+        query = {name: value for name, value in filters.items() if value}
+        if sort != self.default_sort:
+            query['sort'] = sort
+        if size != self.page_size:
+            query['page_size'] = size
+
+        return {
+            'items': rows,
+            'filters': filters,
+            'sort': sort,
+            'sort_options': self.sort_options(),
+            'page_size': size,
+            'query': urlencode(query),
+            'next_cursor': self.encode_cursor(rows[-1].list_sort_value, rows[-1].pk) if rows and has_next else None,
+            'previous_cursor': self.encode_cursor(rows[0].list_sort_value, rows[0].pk) if rows and has_previous else None,
+        }
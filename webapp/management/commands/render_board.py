@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from webapp.artifacts import artifact_tag, current_board_tag, render_board_artifacts
+
+class Command(BaseCommand):
+    help = 'Предварительная отрисовка публичного табло рейсов (gzip/brotli)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--watch', action='store_true',
+            help='Перерисовывать табло при каждом изменении версии и сдвиге окна ближайших рейсов')
+        parser.add_argument('--interval', type=float, default=1,
+            help='Интервал проверки версии табло (сек.)')
+
+    def handle(self, *args, **options):
+        while True:
+            if artifact_tag() != current_board_tag():
+                try:
+                    version = render_board_artifacts()
+                    self.stdout.write(self.style.SUCCESS(f'Табло отрисовано, версия {version}'))
+                except Exception as e:
+                    self.stdout.write(self.style.ERROR(f'Ошибка отрисовки табло: {str(e)}'))
+
+            if not options['watch']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,86 @@
+import csv
+from decimal import Decimal
+from typing import Iterator
+
+from django.db.models import Count, DecimalField, Q, QuerySet, Sum, Value
+from django.db.models.functions import Coalesce
+
+from dbapp.models import BoardingPass, Passenger
+
+MANIFEST_CHUNK_SIZE = 500
+
+MANIFEST_HEADERS = [
+    'Фамилия', 'Имя', 'Отчество', 'Место', 'Регистрация', 'Посадка',
+    'Снят с рейса', 'Мест багажа', 'Вес багажа, кг',
+]
+
+def manifest_passengers(flight_id: int) -> QuerySet:
+    active_baggage = Q(baggage__is_removed=False)
+    return (
+        Passenger.objects.filter(flight_id=flight_id)
+        .defer('passport')
+        .select_related('boardingpass')
+        .annotate(
+            baggage_count=Count('baggage', filter=active_baggage),
+            baggage_weight=Coalesce(
+                Sum('baggage__weight', filter=active_baggage),
+                Value(Decimal('0')),
+                output_field=DecimalField(max_digits=10, decimal_places=2),
+            ),
+        )
+        .order_by('last_name', 'first_name', 'pk')
+    )
+
+def passenger_seat(passenger: Passenger) -> str | None:
+    try:
+        return passenger.boardingpass.seat # type: ignore
+    except BoardingPass.DoesNotExist:
+        return None
+
+def manifest_row(passenger: Passenger) -> dict:
+    return {
+        'id': passenger.pk,
+        'last_name': passenger.last_name,
+        'first_name': passenger.first_name,
+        'middle_name': passenger.middle_name,
+        'seat': passenger_seat(passenger),
+        'check_in_passed': passenger.check_in_passed,
+        'boarding_passed': passenger.boarding_passed,
+        'is_removed': passenger.is_removed,
+        'baggage_count': passenger.baggage_count, # type: ignore
+        'baggage_weight': passenger.baggage_weight, # type: ignore
+    }
+
+def manifest_summary(passengers: list[Passenger]) -> dict:
+    active = [passenger for passenger in passengers if not passenger.is_removed]
+    return {
+        'passengers': len(active),
+        'removed': len(passengers) - len(active),
+        'checked_in': sum(passenger.check_in_passed for passenger in active),
+        'boarded': sum(passenger.boarding_passed for passenger in active),
+        'seated': sum(passenger_seat(passenger) is not None for passenger in active),
+        'baggage_count': sum(passenger.baggage_count for passenger in active), # type: ignore
+        'baggage_weight': sum((passenger.baggage_weight for passenger in active), Decimal('0')), # type: ignore
+    }
+
+class _Echo:
+    def write(self, value: str) -> str:
+        return value
+
+def manifest_csv(flight_id: int) -> Iterator[str]:
+    writer = csv.writer(_Echo(), delimiter=';')
+    yield '\ufeff'
+    yield writer.writerow(MANIFEST_HEADERS)
+
+    for passenger in manifest_passengers(flight_id).iterator(chunk_size=MANIFEST_CHUNK_SIZE):
+        yield writer.writerow([
+            passenger.last_name,
+            passenger.first_name,
+            passenger.middle_name or '',
+            passenger_seat(passenger) or '',
+            'Да' if passenger.check_in_passed else 'Нет',
+            'Да' if passenger.boarding_passed else 'Нет',
+            'Да' if passenger.is_removed else 'Нет',
+            passenger.baggage_count, # type: ignore
+            passenger.baggage_weight, # type: ignore
+        ])
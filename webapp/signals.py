@@ -0,0 +1,41 @@
+from django.apps import apps
+from django.contrib.auth.models import Group
+from django.db.models.signals import m2m_changed, post_delete, post_save
+
+from webapp.board import invalidate_board
+from webapp.versions import invalidate_auth, invalidate_row, invalidate_table
+
+BOARD_MODELS = [
+    'dbapp.Flight',
+    'dbapp.FlightTime',
+    'dbapp.FlightStatus',
+    'dbapp.GateFlight',
+    'dbapp.CheckInDeskFlight',
+    'dbapp.Airplane',
+    'dbapp.Airline',
+    'dbapp.Airport',
+]
+
+for model in BOARD_MODELS:
+    post_save.connect(invalidate_board, sender=model, dispatch_uid=f'board_save_{model}')
+    post_delete.connect(invalidate_board, sender=model, dispatch_uid=f'board_delete_{model}')
+
+for model in apps.get_app_config('dbapp').get_models():
+    if model._meta.managed:
+        post_save.connect(invalidate_table, sender=model, dispatch_uid=f'version_save_{model._meta.label}')
+        post_delete.connect(invalidate_table, sender=model, dispatch_uid=f'version_delete_{model._meta.label}')
+
+Worker = apps.get_model('dbapp', 'Worker')
+
+for through in [Worker.groups.through, Worker.user_permissions.through, Group.permissions.through]:
+    m2m_changed.connect(invalidate_auth, sender=through, dispatch_uid=f'auth_m2m_{through._meta.label}')
+
+post_save.connect(invalidate_auth, sender=Group, dispatch_uid='auth_group_save')
+post_delete.connect(invalidate_auth, sender=Group, dispatch_uid='auth_group_delete')
+post_save.connect(invalidate_auth, sender=Worker, dispatch_uid='auth_worker_save')
+
+def invalidate_passenger_row(sender, instance, **kwargs):
+    invalidate_row('dbapp.passenger', instance.pk)
+
+post_save.connect(invalidate_passenger_row, sender='dbapp.Passenger', dispatch_uid='row_save_passenger')
+post_delete.connect(invalidate_passenger_row, sender='dbapp.Passenger', dispatch_uid='row_delete_passenger')
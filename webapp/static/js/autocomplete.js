@@ -0,0 +1,75 @@
+document.addEventListener('DOMContentLoaded', function() {
+    const MORE = '__more__';
+
+    document.querySelectorAll('select[data-autocomplete]').forEach(function(select) {
+        const search = document.createElement('input');
+        search.type = 'text';
+        search.className = 'form-control mb-1';
+        search.placeholder = 'Начните вводить для поиска';
+        search.autocomplete = 'off';
+        search.disabled = select.disabled;
+        select.before(search);
+
+        let timer;
+        let request;
+        let cursor = null;
+
+        function option(value, text, data) {
+            const item = document.createElement('option');
+            item.value = value;
+            item.textContent = text;
+            Object.entries(data || {}).forEach(([key, value]) => item.dataset[key] = value);
+            return item;
+        }
+
+        async function load(append) {
+            request?.abort();
+            request = new AbortController();
+
+            const url = new URL(select.dataset.autocomplete, window.location.href);
+            url.searchParams.set('q', search.value.trim());
+            if (append && cursor) {
+                url.searchParams.set('after', cursor);
+            }
+
+            try {
+                const response = await fetch(url, {signal: request.signal});
+                const data = await response.json();
+
+                select.querySelector(`option[value="${MORE}"]`)?.remove();
+                if (!append) {
+                    const keep = new Set(['', select.value]);
+                    Array.from(select.options).filter(item => !keep.has(item.value)).forEach(item => item.remove());
+                }
+
+                const existing = new Set(Array.from(select.options).map(item => item.value));
+                data.results
+                    .filter(result => !existing.has(String(result.id)))
+                    .forEach(result => select.add(option(result.id, result.text, result.data)));
+
+                cursor = data.next_cursor;
+                if (cursor) {
+                    select.add(option(MORE, 'Показать ещё…'));
+                }
+            } catch (e) {}
+        }
+
+        search.addEventListener('input', function() {
+            clearTimeout(timer);
+            timer = setTimeout(() => load(false), 250);
+        });
+        search.addEventListener('focus', function() {
+            if (select.options.length <= 2) {
+                load(false);
+            }
+        }, {once: true});
+
+        select.addEventListener('change', function(event) {
+            if (select.value === MORE) {
+                event.stopImmediatePropagation();
+                select.selectedIndex = 0;
+                load(true);
+            }
+        });
+    });
+});
@@ -1,3 +1,826 @@
-from django.test import TestCase
+import asyncio
+import gzip
+import io
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from decimal import Decimal
+from importlib import import_module
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from cryptography.fernet import Fernet
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, OperationalError
+from django.http import QueryDict
+from django.test import override_settings, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from fernet_fields import hkdf
+
+from dbapp.management.commands.rotate_fernet_keys import Command as RotateFernetKeys
+from dbapp.models import Airline, Airplane, Airport, Baggage, blind_index, BoardFlight, BoardingPass, CheckInDesk, CheckInDeskFlight, Flight, FlightStatus, Gate, GateFlight, ImportJob, KeyRotationCheckpoint, Passenger, Worker
+from webapp.artifacts import render_board_artifacts
+from webapp.board import board_events, board_poller, board_snapshot, board_version, fids_feed, FIDS_WINDOW_STEP, publish_board_event
+from webapp.encryption import defer_encrypted, iter_decrypted
+from webapp.importing import AirlineImporter, AirplaneImporter, AirportImporter, ImportResult, WorkerImporter
+from webapp.versions import AUTH_VERSION_LABEL, table_versions
 
 # Create your tests here.
+class WorkerListQueriesTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = Worker.objects.create_superuser(username='admin', password='admin', phone='79000000000')
+        cls.groups = [Group.objects.create(name=name) for name in ('Диспетчер', 'Регистратор', 'Кассир')]
+
+    def add_workers(self, count: int):
+        start = Worker.objects.count()
+        for i in range(start, start + count):
+            worker = Worker.objects.create_user(username=f'worker{i}', password='x', phone=f'7900{i:07d}')
+            worker.groups.set(self.groups[:i % 3 + 1])
+
+    def count_queries(self, url: str) -> int:
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_group_names_use_prefetch(self):
+        self.add_workers(20)
+        with self.assertNumQueries(2):
+            names = [worker.group_names for worker in Worker.objects.prefetch_related('groups')]
+        self.assertIn('Диспетчер, Регистратор', names)
+
+    def test_worker_pages_do_not_query_per_worker(self):
+        self.client.force_login(self.admin)
+        self.add_workers(3)
+        few = {url: self.count_queries(url) for url in (reverse('workers'), reverse('worker_export'))}
+
+        self.add_workers(40)
+        for url, expected in few.items():
+            self.assertEqual(self.count_queries(url), expected, url)
+
+class BoardTestData:
+    @classmethod
+    def setUpTestData(cls):
+        cls.status = FlightStatus.objects.create(name='Запланирован')
+        cls.home = Airport.objects.create(pk=settings.HOME_AIRPORT_ID, name='Подольск', IATA_code='PDL', ICAO_code='UUPD')
+        cls.other = Airport.objects.create(name='Казань', IATA_code='KZN', ICAO_code='UWKD')
+        cls.airline = Airline.objects.create(
+            name='Аэрофлот', IATA_code='SU', ICAO_code='AFL',
+            contact_person='Иванов', contact_phone='79000000000', contact_email='su@example.com',
+        )
+        cls.airplane = Airplane.objects.create(tail_number='RA-1', name='A320', airline=cls.airline, layout='3-3', rows=30)
+
+    def setUp(self):
+        super().setUp()
+        # Snapshots are cached by board version, which restarts with every test
+        cache.clear()
+
+    def add_flights(self, count: int, start: timedelta = timedelta(), arrivals: bool = False, number: int = 100) -> list[Flight]:
+        now = timezone.now()
+        departure, arrival = (self.other, self.home) if arrivals else (self.home, self.other)
+        return [
+            Flight.objects.create(
+                number=number + i, airplane=self.airplane, flight_status=self.status,
+                departure_airport=departure, arrival_airport=arrival,
+                planned_departure=now + start + timedelta(minutes=10 * i),
+                planned_arrival=now + start + timedelta(minutes=10 * i + 90),
+            )
+            for i in range(count)
+        ]
+
+class BoardPageTests(BoardTestData, TestCase):
+    def ids(self, params: str = '') -> list[int]:
+        return [row['id'] for row in board_snapshot(QueryDict(params))['flights']]
+
+    def test_default_board_starts_at_now(self):
+        self.add_flights(3, start=-timedelta(days=30))
+        current = self.add_flights(2, number=200)
+
+        self.assertEqual(self.ids(), [flight.pk for flight in current])
+        self.assertEqual(len(self.ids('window=all')), 5)
+
+    def test_filters(self):
+        departures = self.add_flights(2)
+        arrivals = self.add_flights(2, arrivals=True, number=300)
+
+        self.assertEqual(self.ids('window=all&type=departures'), [flight.pk for flight in departures])
+        self.assertEqual(set(self.ids('window=all&type=arrivals')), {flight.pk for flight in arrivals})
+        self.assertEqual(self.ids('window=all&number=SU 301'), [arrivals[1].pk])
+
+    def test_cursors_walk_the_board_in_order(self):
+        flights = self.add_flights(5)
+        BoardFlight.objects.filter(flight=flights[2]).update(board_time=None)
+        expected = [flight.pk for flight in flights if flight != flights[2]] + [flights[2].pk]
+
+        seen, params, pages = [], 'window=all&page_size=2', []
+        while True:
+            page = board_snapshot(QueryDict(params))
+            pages.append(page)
+            seen += [row['id'] for row in page['flights']]
+            if not page['next_cursor']:
+                break
+            params = f"window=all&page_size=2&after={page['next_cursor']}"
+        self.assertEqual(seen, expected)
+
+        previous = board_snapshot(QueryDict(f"window=all&page_size=2&before={pages[-1]['previous_cursor']}"))
+        self.assertEqual(previous['flights'], pages[-2]['flights'])
+
+class BoardCacheTests(BoardTestData, TestCase):
+    def test_version_survives_cache_eviction(self):
+        publish_board_event({'reset': True})
+        version = publish_board_event({'reset': True})
+        cache.clear()
+        self.assertEqual(board_version(), version)
+        self.assertEqual(publish_board_event({'reset': True}), version + 1)
+
+    def test_snapshot_is_served_from_cache(self):
+        self.add_flights(3)
+        board_snapshot(QueryDict())
+        with self.assertNumQueries(1):
+            board_snapshot(QueryDict())
+
+    def test_snapshot_follows_flight_changes(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            flight, = self.add_flights(1)
+        snapshot = board_snapshot(QueryDict())
+        self.assertEqual([row['id'] for row in snapshot['flights']], [flight.pk])
+
+        status = FlightStatus.objects.create(name='Задерживается')
+        with self.captureOnCommitCallbacks(execute=True):
+            flight.flight_status = status
+            flight.save()
+
+        updated = board_snapshot(QueryDict())
+        self.assertGreater(updated['version'], snapshot['version'])
+        self.assertEqual(updated['flights'][0]['status_name'], 'Задерживается')
+
+@mock.patch('webapp.board.BOARD_STREAM_POLL_INTERVAL', 0.01)
+class BoardStreamTests(BoardTestData, TestCase):
+    async def next_event(self, stream) -> str:
+        while True:
+            message = await asyncio.wait_for(anext(stream), 5)
+            if not message.startswith(('retry:', ':')):
+                return message
+
+    async def close(self, *streams):
+        for stream in streams:
+            await stream.aclose()
+        poller = board_poller()
+        if poller.task:
+            await asyncio.wait_for(poller.task, 5)
+
+    async def test_streams_share_one_poller(self):
+        streams = [board_events(None), board_events(None)]
+        for stream in streams:
+            await anext(stream)
+        self.assertEqual(board_poller().clients, 2)
+
+        version = await sync_to_async(publish_board_event)({'id': 1, 'code': 'SU 100'})
+        for stream in streams:
+            message = await self.next_event(stream)
+            self.assertIn(f'id: {version}\nevent: flight', message)
+            self.assertIn('"code": "SU 100"', message)
+
+        await self.close(*streams)
+        self.assertEqual(board_poller().clients, 0)
+
+    async def test_reset_event_ends_the_stream(self):
+        stream = board_events(None)
+        await anext(stream)
+        await sync_to_async(publish_board_event)({'reset': True})
+        self.assertIn('event: reset', await self.next_event(stream))
+        await self.close(stream)
+
+    def test_board_formats_pushed_times_in_server_time_zone(self):
+        response = self.client.get(reverse('index'), {'window': 'all'})
+        self.assertContains(response, f"timeZone: '{settings.TIME_ZONE}'")
+
+class ConditionalPageTests(BoardTestData, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.admin = Worker.objects.create_superuser(username='admin', password='admin', phone='79000000000')
+        self.client.force_login(self.admin)
+
+    def get(self, url: str, etag: str | None = None):
+        return self.client.get(url, HTTP_IF_NONE_MATCH=etag) if etag else self.client.get(url)
+
+    def test_unchanged_list_is_not_modified(self):
+        etag = self.get(reverse('airlines'))['ETag']
+        self.assertEqual(self.get(reverse('airlines'), etag).status_code, 304)
+
+    def test_change_to_listed_table_invalidates_page(self):
+        etag = self.get(reverse('airlines'))['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.airline.name = 'Аэрофлот-Дон'
+            self.airline.save()
+
+        response = self.get(reverse('airlines'), etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Аэрофлот-Дон')
+
+    def test_permission_change_invalidates_page(self):
+        etag = self.get(reverse('airlines'))['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.admin.groups.add(Group.objects.create(name='Диспетчер'))
+        self.assertEqual(self.get(reverse('airlines'), etag).status_code, 200)
+
+    def test_board_is_not_modified_until_a_flight_changes(self):
+        etag = self.get(reverse('index'))['ETag']
+        self.assertEqual(self.get(reverse('index'), etag).status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.add_flights(1)
+        self.assertEqual(self.get(reverse('index'), etag).status_code, 200)
+
+class FidsFeedTests(BoardTestData, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.now = time.time() // FIDS_WINDOW_STEP * FIDS_WINDOW_STEP + 1
+        self.clock = self.enterContext(mock.patch('webapp.board.time.time', return_value=self.now))
+
+    def feed(self, previous: dict | None = None) -> dict:
+        if previous is None:
+            return fids_feed('all', None)
+        return fids_feed('all', previous['version'], previous['window'])
+
+    def test_full_sync_is_limited_to_the_window(self):
+        self.add_flights(2, start=-timedelta(days=30))
+        current = self.add_flights(2, number=200)
+
+        feed = self.feed()
+        self.assertTrue(feed['full'])
+        self.assertEqual([row['id'] for row in feed['flights']], [flight.pk for flight in current])
+        self.assertEqual(feed['flights'][0]['code'], 'SU 200')
+
+    def test_delta_carries_only_changed_flights(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            flights = self.add_flights(3)
+        status = FlightStatus.objects.create(name='Посадка')
+        removed = flights[2].pk
+        feed = self.feed()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            flights[1].flight_status = status
+            flights[1].save()
+            flights[2].delete()
+
+        delta = self.feed(feed)
+        self.assertFalse(delta['full'])
+        self.assertEqual([row['id'] for row in delta['flights']], [flights[1].pk])
+        self.assertEqual(delta['removed'], [removed])
+
+    def test_delta_survives_until_the_window_steps(self):
+        feed = self.feed()
+        self.clock.return_value = self.now + FIDS_WINDOW_STEP - 2
+        self.assertFalse(self.feed(feed)['full'])
+
+        self.clock.return_value = self.now + FIDS_WINDOW_STEP
+        self.assertTrue(self.feed(feed)['full'])
+
+class BoardReadModelTests(BoardTestData, TestCase):
+    def test_flight_save_builds_board_row(self):
+        flight, = self.add_flights(1)
+        row = BoardFlight.objects.get(flight=flight)
+        self.assertEqual((row.code, row.departure_iata, row.arrival_name, row.status_name), ('SU 100', 'PDL', 'Казань', 'Запланирован'))
+        self.assertEqual(row.board_time, flight.planned_departure)
+
+    def test_reference_changes_update_board_rows(self):
+        flights = self.add_flights(3)
+        self.airline.IATA_code = 'S7'
+        self.airline.save()
+        self.home.name = 'Домодедово'
+        self.home.save()
+        self.status.name = 'По расписанию'
+        self.status.save()
+
+        rows = BoardFlight.objects.filter(flight__in=flights)
+        self.assertEqual({(row.airline_code, row.code, row.departure_name, row.status_name) for row in rows}, {
+            ('S7', f'S7 {flight.number}', 'Домодедово', 'По расписанию') for flight in flights
+        })
+
+    def test_hidden_field_changes_leave_board_rows_alone(self):
+        self.add_flights(2)
+        updated_at = set(BoardFlight.objects.values_list('updated_at', flat=True))
+        self.airline.contact_person = 'Петров'
+        self.airline.save()
+        self.assertEqual(set(BoardFlight.objects.values_list('updated_at', flat=True)), updated_at)
+
+    def test_refresh_works_in_chunks(self):
+        flights = self.add_flights(5)
+        BoardFlight.objects.all().delete()
+        with mock.patch.object(BoardFlight, 'REFRESH_CHUNK_SIZE', 2), CaptureQueriesContext(connection) as queries:
+            BoardFlight.refresh(Flight.objects.all())
+
+        self.assertEqual(set(BoardFlight.objects.values_list('flight_id', flat=True)), {flight.pk for flight in flights})
+        inserts = [query['sql'] for query in queries if query['sql'].startswith('INSERT')]
+        self.assertEqual(len(inserts), 3)
+
+class PassengerTestData(BoardTestData):
+    def setUp(self):
+        super().setUp()
+        self.admin = Worker.objects.create_superuser(username='admin', password='admin', phone='79000000000')
+        self.client.force_login(self.admin)
+
+    def add_passenger(self, flight: Flight, last_name: str, passport: str, **fields) -> Passenger:
+        return Passenger.objects.create(flight=flight, last_name=last_name, first_name='Иван', middle_name='', passport=passport, **fields)
+
+class RowFragmentCacheTests(PassengerTestData, TestCase):
+    def test_passenger_card_is_cached_until_the_passenger_changes(self):
+        flight, = self.add_flights(1)
+        passenger = self.add_passenger(flight, 'Иванов', '4510123456')
+        self.assertContains(self.client.get(reverse('passengers')), 'Иванов')
+
+        Passenger.objects.filter(pk=passenger.pk).update(last_name='Петров')
+        self.assertContains(self.client.get(reverse('passengers')), 'Иванов')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            passenger.last_name = 'Сидоров'
+            passenger.save()
+        self.assertContains(self.client.get(reverse('passengers')), 'Сидоров')
+
+    def test_flight_card_follows_its_board_row(self):
+        flight, = self.add_flights(1)
+        self.assertContains(self.client.get(reverse('flights')), 'Запланирован')
+
+        self.status.name = 'Посадка'
+        self.status.save()
+        self.assertContains(self.client.get(reverse('flights')), 'Посадка')
+
+class BoardArtifactTests(BoardTestData, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.enterContext(override_settings(BOARD_ARTIFACT_DIR=tempfile.mkdtemp()))
+        self.add_flights(2)
+        render_board_artifacts()
+
+    def get(self, url: str = '/'):
+        return self.client.get(url, HTTP_ACCEPT_ENCODING='gzip, deflate')
+
+    def test_anonymous_board_is_served_precompressed(self):
+        for url, text in (('/', 'SU 101'), ('/board.json', '"SU 101"')):
+            response = self.get(url)
+            self.assertEqual(response['Content-Encoding'], 'gzip')
+            self.assertIn(text, gzip.decompress(b''.join(response.streaming_content)).decode())
+
+    def test_stale_artifact_is_not_served(self):
+        publish_board_event({'reset': True})
+        self.assertFalse(self.get().has_header('Content-Encoding'))
+
+    def test_window_step_makes_artifact_stale(self):
+        with mock.patch('webapp.board.time.time', return_value=time.time() + 3600):
+            self.assertFalse(self.get().has_header('Content-Encoding'))
+
+    def test_signed_in_users_get_the_live_page(self):
+        self.client.force_login(Worker.objects.create_superuser(username='admin', password='admin', phone='79000000000'))
+        self.assertFalse(self.get().has_header('Content-Encoding'))
+
+class BoardWindowTests(BoardTestData, TestCase):
+    def test_arrivals_are_ordered_by_arrival_time(self):
+        departure, = self.add_flights(1, start=timedelta(minutes=30))
+        arrival, = self.add_flights(1, start=-timedelta(hours=5), arrivals=True, number=900)
+        Flight.objects.filter(pk=arrival.pk).update(planned_arrival=timezone.now() + timedelta(hours=1))
+        BoardFlight.refresh(Flight.objects.filter(pk=arrival.pk))
+
+        self.assertEqual([row['id'] for row in board_snapshot(QueryDict())['flights']], [departure.pk, arrival.pk])
+
+    def test_migration_backfills_board_time_by_direction(self):
+        departure, = self.add_flights(1)
+        arrival, = self.add_flights(1, arrivals=True, number=900)
+        BoardFlight.objects.update(board_time=None)
+
+        import_module('dbapp.migrations.0017_boardflight_board_time_home').fill_board_time(apps, None)
+        self.assertEqual(BoardFlight.objects.get(flight=departure).board_time, departure.planned_departure)
+        self.assertEqual(BoardFlight.objects.get(flight=arrival).board_time, arrival.planned_arrival)
+
+    def test_window_page_etag_follows_the_clock(self):
+        etag = self.client.get(reverse('index'), {'window': 'now'})['ETag']
+        self.assertEqual(self.client.get(reverse('index'), {'window': 'now'}, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        with mock.patch('webapp.board.time.time', return_value=time.time() + 120):
+            response = self.client.get(reverse('index'), {'window': 'now'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+class BlindIndexTests(PassengerTestData, TestCase):
+    def test_hash_ignores_formatting(self):
+        self.assertEqual(blind_index('45 10 123-456'), blind_index('4510123456'))
+        self.assertNotEqual(blind_index('4510123456'), blind_index('4510123457'))
+        self.assertIsNone(blind_index(''))
+
+    def test_passenger_is_found_by_passport(self):
+        flight, = self.add_flights(1)
+        passenger = self.add_passenger(flight, 'Иванов', '4510123456')
+        self.add_passenger(flight, 'Петров', '4510654321')
+        self.assertEqual(passenger.passport_hash, blind_index('4510123456'))
+
+        response = self.client.get(reverse('passengers'), {'passport': '4510 123456'})
+        self.assertContains(response, 'Иванов')
+        self.assertNotContains(response, 'Петров')
+
+    def test_worker_is_found_by_phone(self):
+        Worker.objects.create_user(username='ivanov', last_name='Иванов', password='x', phone='79001112233')
+        Worker.objects.create_user(username='petrov', last_name='Петров', password='x', phone='79004445566')
+
+        response = self.client.get(reverse('workers'), {'phone': '7 (900) 111-22-33'})
+        self.assertContains(response, 'Иванов')
+        self.assertNotContains(response, 'Петров')
+
+class DeferredDecryptionTests(PassengerTestData, TestCase):
+    def test_lists_do_not_load_encrypted_columns(self):
+        sql = str(defer_encrypted(Passenger.objects.select_related('flight'), ['flight']).query)
+        self.assertNotIn('"passport"', sql)
+
+    def test_decryption_adds_no_queries(self):
+        flight, = self.add_flights(1)
+        passports = [f'45101234{i:02d}' for i in range(5)]
+        for i, passport in enumerate(passports):
+            self.add_passenger(flight, f'Иванов{i}', passport)
+
+        with self.assertNumQueries(1):
+            passengers = list(iter_decrypted(Passenger.objects.order_by('pk'), ['passport'], batch_size=2, workers=2))
+        self.assertEqual([passenger.passport for passenger in passengers], passports)
+
+    def test_export_contains_decrypted_passports(self):
+        flight, = self.add_flights(1)
+        self.add_passenger(flight, 'Иванов', '4510123456')
+        response = self.client.get(reverse('passenger_export'))
+        self.assertIn('4510123456', response.content.decode('utf-8-sig'))
+
+class FernetKeyRotationTests(TestCase):
+    def setUp(self):
+        self.field = Worker._meta.get_field('phone')
+        self.addCleanup(self.reset_keys)
+
+    def reset_keys(self):
+        for name in ('keys', 'fernet_keys', 'fernet'):
+            self.field.__dict__.pop(name, None)
+
+    def ciphertext(self, worker: Worker) -> bytes:
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT phone FROM {Worker._meta.db_table} WHERE id = %s', [worker.pk])
+            return bytes(cursor.fetchone()[0])
+
+    def test_rotation_reencrypts_with_first_key(self):
+        worker = Worker.objects.create_user(username='worker', password='x', phone='79000000001')
+        new_key = Fernet.generate_key().decode()
+
+        with override_settings(FERNET_KEYS=[new_key, *settings.FERNET_KEYS]):
+            self.reset_keys()
+            call_command('rotate_fernet_keys', workers=1, sleep=0, stdout=io.StringIO())
+
+        new_fernet = Fernet(hkdf.derive_fernet_key(new_key))
+        self.assertEqual(new_fernet.decrypt(self.ciphertext(worker)), b'79000000001')
+        self.assertTrue(KeyRotationCheckpoint.objects.filter(field='dbapp.worker.phone', finished_at__isnull=False).exists())
+
+    def test_concurrent_edit_is_not_overwritten(self):
+        worker = Worker.objects.create_user(username='worker', password='x', phone='79000000001')
+        token = self.ciphertext(worker)
+        Worker.objects.filter(pk=worker.pk).update(phone='79000000002')
+
+        stale = RotateFernetKeys().write_chunk(Worker, 'phone', [(worker.pk, token, b'rotated')])
+        self.assertEqual(stale, [worker.pk])
+        self.assertEqual(Worker.objects.get(pk=worker.pk).phone, '79000000002')
+
+class PassengerSearchTests(PassengerTestData, TestCase):
+    def search(self, **params) -> list[str]:
+        response = self.client.get(reverse('passenger_search'), params)
+        return [result['name'] for result in response.json()['results']]
+
+    def test_words_match_name_prefixes_in_order(self):
+        flight, = self.add_flights(1)
+        for last_name in ('Иванов', 'Иваненко', 'Петров'):
+            self.add_passenger(flight, last_name, f'4510{len(last_name):06d}')
+
+        self.assertEqual(self.search(q='Иван'), ['Иваненко Иван', 'Иванов Иван'])
+        self.assertEqual(self.search(q='Иванов Ив'), ['Иванов Иван'])
+        self.assertEqual(self.search(q='Иванов Пётр'), [])
+        self.assertEqual(self.search(q=' '), [])
+
+    def test_search_can_be_limited_to_a_flight(self):
+        first, second = self.add_flights(2)
+        self.add_passenger(first, 'Иванов', '4510000001')
+        self.add_passenger(second, 'Иваненко', '4510000002')
+
+        response = self.client.get(reverse('passenger_search'), {'q': 'Иван', 'flight': second.pk})
+        self.assertEqual([(result['name'], result['flight']) for result in response.json()['results']], [('Иваненко Иван', 'SU 101')])
+
+class FlightManifestTests(PassengerTestData, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.flight, = self.add_flights(1)
+        ivanov = self.add_passenger(self.flight, 'Иванов', '4510000001', check_in_passed=True, boarding_passed=True)
+        BoardingPass.objects.create(id=ivanov, seat='12A')
+        Baggage.objects.create(passenger=ivanov, weight=Decimal('20.5'))
+        Baggage.objects.create(passenger=ivanov, weight=Decimal('5'), is_removed=True)
+        self.add_passenger(self.flight, 'Петров', '4510000002', check_in_passed=True)
+        removed = self.add_passenger(self.flight, 'Сидоров', '4510000003', is_removed=True)
+        Baggage.objects.create(passenger=removed, weight=Decimal('10'))
+
+    def test_summary_counts_active_passengers(self):
+        with self.assertNumQueries(4):
+            manifest = self.client.get(reverse('flight_manifest_json', args=[self.flight.pk])).json()
+
+        summary = manifest['summary']
+        self.assertEqual(Decimal(summary.pop('baggage_weight')), Decimal('20.5'))
+        self.assertEqual(summary, {
+            'passengers': 2, 'removed': 1, 'checked_in': 2, 'boarded': 1, 'seated': 1, 'baggage_count': 1,
+        })
+        self.assertEqual(
+            [(row['last_name'], row['seat'], row['baggage_count']) for row in manifest['passengers']],
+            [('Иванов', '12A', 1), ('Петров', None, 0), ('Сидоров', None, 1)],
+        )
+
+    def test_export_streams_every_passenger(self):
+        response = self.client.get(reverse('flight_manifest_export', args=[self.flight.pk]))
+        lines = b''.join(response.streaming_content).decode().lstrip('﻿').splitlines()
+        self.assertEqual(len(lines), 4)
+        self.assertTrue(lines[1].startswith('Иванов;Иван;;12A;'))
+
+class FlightAirlineCodeTests(BoardTestData, TestCase):
+    def airplane_queries(self, flight: Flight) -> list[str]:
+        with CaptureQueriesContext(connection) as queries:
+            flight.save()
+        return [query['sql'] for query in queries if 'FROM "dbapp_airplane"' in query['sql']]
+
+    def test_code_taken_from_cached_airplane(self):
+        flight = Flight(
+            number=100, airplane=self.airplane, flight_status=self.status,
+            departure_airport=self.home, arrival_airport=self.other, planned_departure=timezone.now(),
+        )
+        self.assertEqual(self.airplane_queries(flight), [])
+        self.assertEqual(flight.airline_code, 'SU')
+
+    def test_unchanged_airplane_not_queried(self):
+        flight = Flight.objects.get(pk=self.add_flights(1)[0].pk)
+        flight.planned_departure += timedelta(minutes=5)
+        self.assertEqual(self.airplane_queries(flight), [])
+        with self.assertNumQueries(0):
+            self.assertEqual(str(flight), 'SU 100')
+
+    def test_changed_airplane_recomputes_code(self):
+        airline = Airline.objects.create(name='Победа', IATA_code='DP', ICAO_code='PBD')
+        airplane = Airplane.objects.create(tail_number='RA-2', name='B737', airline=airline, layout='3-3', rows=31)
+        flight = Flight.objects.get(pk=self.add_flights(1)[0].pk)
+        flight.airplane_id = airplane.pk
+        self.assertEqual(len(self.airplane_queries(flight)), 1)
+        self.assertEqual(Flight.objects.get(pk=flight.pk).airline_code, 'DP')
+
+class FlightAutocompleteTests(PassengerTestData, TestCase):
+    def options(self, name: str, params: str = '') -> list[int]:
+        response = self.client.get(f"{reverse('autocomplete', args=[name])}?{params}")
+        return [option['id'] for option in response.json()['results']]
+
+    def test_check_in_flights_exclude_desk_flights(self):
+        assigned, free = self.add_flights(2)
+        desk = CheckInDesk.objects.create(number='1', worker=self.admin)
+        CheckInDeskFlight.objects.create(desk=desk, flight=assigned)
+
+        self.assertEqual(self.options('check_in_flights', f'desk={desk.pk}'), [free.pk])
+        self.assertEqual(sorted(self.options('check_in_flights')), [assigned.pk, free.pk])
+
+        response = self.client.get(reverse('check_in_desk_flights', args=[desk.pk]))
+        self.assertContains(response, f"{reverse('autocomplete', args=['check_in_flights'])}?desk={desk.pk}")
+
+    def test_gate_flights_exclude_gate_flights(self):
+        boarding = FlightStatus.objects.create(pk=3, name='Посадка')
+        assigned, free = self.add_flights(2)
+        Flight.objects.update(flight_status=boarding)
+        gate = Gate.objects.create(number='1', worker=self.admin)
+        GateFlight.objects.create(gate=gate, flight=assigned)
+
+        self.assertEqual(self.options('gate_flights', f'gate={gate.pk}'), [free.pk])
+
+        response = self.client.get(reverse('gate_flights', args=[gate.pk]))
+        self.assertContains(response, f"{reverse('autocomplete', args=['gate_flights'])}?gate={gate.pk}")
+
+class AirportImportTests(TestCase):
+    def import_airports(self, rows: list[str], importer: AirportImporter | None = None, **kwargs) -> ImportResult:
+        data = 'name;IATA_code;ICAO_code\n' + ''.join(f'{row}\n' for row in rows)
+        return (importer or AirportImporter()).run(io.BytesIO(data.encode()), **kwargs)
+
+    def test_file_is_written_in_batches(self):
+        importer = AirportImporter()
+        with mock.patch.object(importer, 'write_items', wraps=importer.write_items) as write_items:
+            result = self.import_airports([f'Аэропорт {i};Q{i:02d};QQ{i:02d}' for i in range(5)], importer, batch_size=2)
+
+        self.assertEqual(result.imported, 5)
+        self.assertEqual([len(call.args[0]) for call in write_items.call_args_list], [2, 2, 1])
+
+    def test_rejected_rows_do_not_fail_the_batch(self):
+        Airport.objects.create(name='Казань', IATA_code='KZN', ICAO_code='UWKD')
+        result = self.import_airports(['Сочи;AER;URSS', 'Другая Казань;KZX;UWKD', 'Длинный;LONG;UUUU', 'Омск;OMS;UNOO'])
+
+        self.assertEqual(result.imported, 2)
+        self.assertEqual(sorted(group['lines'] for group in result.report.values()), [[3], [4]])
+        self.assertEqual(set(Airport.objects.values_list('IATA_code', flat=True)), {'KZN', 'AER', 'OMS'})
+
+    def test_batches_are_checkpointed(self):
+        checkpoints = []
+        result = self.import_airports(
+            [f'Аэропорт {i};Q{i:02d};QQ{i:02d}' for i in range(5)], batch_size=2,
+            checkpoint=lambda result: checkpoints.append((result.line_num, result.imported)),
+        )
+        self.assertEqual(result.imported, 5)
+        self.assertEqual(checkpoints, [(3, 2), (5, 4), (6, 5)])
+
+    def test_resume_starts_at_first_unwritten_row(self):
+        rows = [f'Аэропорт {i};Q{i:02d};QQ{i:02d}' for i in range(6)]
+        importer = AirportImporter()
+        write_items = importer.write_items
+        calls = []
+
+        def flaky(items):
+            calls.append(items)
+            if len(calls) == 2:
+                raise OperationalError('connection lost')
+            return write_items(items)
+
+        checkpoints = []
+        with mock.patch.object(importer, 'write_items', flaky), self.assertRaises(OperationalError):
+            self.import_airports(rows, importer, batch_size=2, checkpoint=lambda result: checkpoints.append(result.line_num))
+        self.assertEqual(checkpoints, [3])
+
+        result = self.import_airports(rows, batch_size=2, result=ImportResult(imported=2, line_num=checkpoints[-1]))
+        self.assertEqual(result.imported, 6)
+        self.assertEqual(Airport.objects.count(), 6)
+
+class AirplaneImportTests(BoardTestData, TestCase):
+    def import_airplanes(self, rows: list[str], **kwargs) -> ImportResult:
+        data = 'tail_number;name;airline;layout;rows\n' + ''.join(f'{row}\n' for row in rows)
+        return AirplaneImporter().run(io.BytesIO(data.encode()), **kwargs)
+
+    def test_airlines_are_resolved_once(self):
+        with CaptureQueriesContext(connection) as queries:
+            result = self.import_airplanes([f'RA-{i:03d};A320;Аэрофлот;3-3;30' for i in range(4)], batch_size=2)
+
+        self.assertEqual(result.imported, 4)
+        self.assertEqual(len([query for query in queries if 'FROM "dbapp_airline"' in query['sql']]), 1)
+        self.assertEqual(Airplane.objects.filter(airline=self.airline).count(), 5)
+
+    def test_ambiguous_airline_name_is_a_row_error(self):
+        Airline.objects.create(
+            name='Аэрофлот', IATA_code='FV', ICAO_code='SDM',
+            contact_person='Петров', contact_phone='79000000001', contact_email='fv@example.com',
+        )
+        Airline.objects.create(
+            name='Победа', IATA_code='DP', ICAO_code='PBD',
+            contact_person='Сидоров', contact_phone='79000000002', contact_email='dp@example.com',
+        )
+        result = self.import_airplanes(['RA-002;A320;Аэрофлот;3-3;30', 'RA-003;B737;Победа;3-3;31'])
+
+        self.assertEqual(result.imported, 1)
+        self.assertEqual([group['lines'] for group in result.report.values()], [[2]])
+        self.assertIn('несколько авиакомпаний', next(iter(result.report)))
+        self.assertFalse(Airplane.objects.filter(tail_number='RA-002').exists())
+
+class ImportJobTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = Worker.objects.create_superuser(username='admin', password='admin', phone='79000000000')
+
+    def setUp(self):
+        self.import_dir = self.enterContext(tempfile.TemporaryDirectory())
+        self.enterContext(override_settings(IMPORT_DIR=self.import_dir))
+        self.client.force_login(self.admin)
+
+    def create_job(self, directory: str | None = None, created_by: Worker | None = None) -> ImportJob:
+        fd, path = tempfile.mkstemp(suffix='.csv', dir=directory or self.import_dir)
+        os.close(fd)
+        return ImportJob.objects.create(kind='airport', file_path=path, status='error', created_by=created_by or self.admin)
+
+    def resume(self, job: ImportJob) -> mock.Mock:
+        with mock.patch('webapp.views.start_import_job') as start, self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('import_job_resume', args=[job.pk]))
+        return start
+
+    def test_job_is_resumed_once(self):
+        job = self.create_job()
+        with mock.patch('webapp.views.start_import_job') as start, self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('import_job_resume', args=[job.pk]))
+            self.client.post(reverse('import_job_resume', args=[job.pk]))
+
+        start.assert_called_once_with(job.pk)
+        self.assertEqual(ImportJob.objects.get(pk=job.pk).status, 'pending')
+
+    def test_file_outside_import_dir_is_not_resumed(self):
+        job = self.create_job(self.enterContext(tempfile.TemporaryDirectory()))
+
+        self.resume(job).assert_not_called()
+        self.assertTrue(os.path.exists(job.file_path))
+        self.assertFalse(self.client.get(reverse('import_job_status', args=[job.pk])).json()['resumable'])
+
+    def test_resume_needs_import_permission(self):
+        worker = Worker.objects.create_user(username='worker', password='x', phone='79000000001')
+        job = self.create_job(created_by=worker)
+        self.client.force_login(worker)
+
+        self.resume(job).assert_not_called()
+        self.assertEqual(ImportJob.objects.get(pk=job.pk).status, 'error')
+
+    def test_jobs_are_not_exposed_through_the_api(self):
+        self.create_job()
+        self.assertEqual(self.client.get('/api/airport/').status_code, 200)
+        self.assertEqual(self.client.get('/api/importjob/').status_code, 404)
+
+class WorkerImportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.group = Group.objects.create(name='Регистратор')
+
+    def import_workers(self, count: int, **kwargs) -> ImportResult:
+        data = 'username;last_name;first_name;email;password;groups\n' + ''.join(
+            f'worker{i};Иванов;Иван;worker{i}@example.com;secret{i};Регистратор\n' for i in range(count)
+        )
+        return WorkerImporter().run(io.BytesIO(data.encode()), **kwargs)
+
+    def test_small_batches_are_hashed_inline(self):
+        with mock.patch('webapp.importing._process_pool') as pool:
+            result = self.import_workers(2)
+
+        pool.assert_not_called()
+        self.assertEqual(result.imported, 2)
+        self.assertTrue(Worker.objects.get(username='worker1').check_password('secret1'))
+
+    @mock.patch('webapp.importing.IMPORT_WORKERS', 2)
+    @mock.patch('webapp.importing.IMPORT_HASH_INLINE_MAX', 1)
+    def test_one_pool_per_run(self):
+        with mock.patch('webapp.importing._process_pool', side_effect=ThreadPoolExecutor) as pool:
+            result = self.import_workers(4, batch_size=2)
+
+        pool.assert_called_once_with(2)
+        self.assertEqual(result.imported, 4)
+        self.assertTrue(Worker.objects.get(username='worker3').check_password('secret3'))
+
+    def test_import_invalidates_permissions(self):
+        version = table_versions([AUTH_VERSION_LABEL])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.import_workers(1)
+
+        self.assertNotEqual(table_versions([AUTH_VERSION_LABEL]), version)
+        self.assertEqual(list(Worker.objects.get(username='worker0').groups.all()), [self.group])
+
+class AirlineUpsertTests(TestCase):
+    def airline(self, i: int, name: str = 'Авиакомпания') -> Airline:
+        return Airline(
+            name=f'{name} {i}', IATA_code=f'{i:02d}', ICAO_code=f'Q{i:02d}',
+            contact_person='Иванов', contact_phone='79000000000', contact_email='info@example.com',
+        )
+
+    def test_merge_matches_on_every_key_field(self):
+        cursor = mock.MagicMock()
+        with mock.patch.object(connection, 'cursor', return_value=cursor):
+            AirlineImporter().merge_batch([self.airline(i) for i in range(400)], ['IATA_code', 'ICAO_code'])
+
+        statements = [call.args for call in cursor.__enter__.return_value.execute.call_args_list]
+        self.assertEqual([len(params) for _, params in statements], [333 * 6, 67 * 6])
+
+        sql, params = statements[0]
+        self.assertIn(
+            'ON target."IATA_code" = source."IATA_code" AND target."ICAO_code" = source."ICAO_code" '
+            'WHEN MATCHED THEN UPDATE SET target."name" = source."name", ', sql,
+        )
+        self.assertEqual(sql.count('(%s, %s, %s, %s, %s, %s)'), 333)
+        self.assertEqual(params[:6], ['Авиакомпания 0', '00', 'Q00', 'Иванов', '79000000000', 'info@example.com'])
+
+    def test_upsert_counts_rows_written(self):
+        Airline.objects.create(name='Старое название', IATA_code='SU', ICAO_code='AFL')
+        data = (
+            'name;IATA_code;ICAO_code\n'
+            'Аэрофлот;SU;AFL\n'
+            'Победа;DP;PBD\n'
+            'Победа;DP;PBD\n'
+        )
+        result = AirlineImporter().run(io.BytesIO(data.encode()))
+
+        self.assertEqual(result.imported, 2)
+        self.assertEqual(dict(Airline.objects.values_list('IATA_code', 'name')), {'SU': 'Аэрофлот', 'DP': 'Победа'})
+
+class ImportDuplicateTests(TestCase):
+    def csv(self, rows: list[str]) -> bytes:
+        return ('username;last_name;first_name;email\n' + ''.join(f'{row}\n' for row in rows)).encode()
+
+    def test_repeated_key_keeps_first_row(self):
+        rows = [f'worker{i};Иванов;Иван;worker{i}@example.com' for i in range(3)] + ['worker1;Петров;Пётр;other@example.com']
+        result = WorkerImporter().run(io.BytesIO(self.csv(rows)), batch_size=2)
+
+        self.assertEqual(result.imported, 3)
+        self.assertEqual(Worker.objects.count(), 3)
+        self.assertEqual(Worker.objects.get(username='worker1').last_name, 'Иванов')
+        self.assertEqual([group['lines'] for group in result.report.values()], [[5]])
+
+    def test_dry_run_predicts_the_import(self):
+        rows = ['worker0;Иванов;Иван;worker0@example.com', 'worker0;Петров;Пётр;worker0@example.com', ';Сидоров;Сидор;x@example.com']
+        predicted = WorkerImporter().validate(io.BytesIO(self.csv(rows)))
+        self.assertFalse(Worker.objects.exists())
+
+        result = WorkerImporter().run(io.BytesIO(self.csv(rows)))
+        self.assertEqual((predicted.imported, predicted.error_count), (result.imported, result.error_count))
+        self.assertEqual((result.imported, result.error_count), (1, 2))
@@ -4,6 +4,10 @@ from .views import *
 
 urlpatterns = [
     path('', index, name='index'),
+    path('board.json', board_json, name='board_json'),
+    path('board/stream/', board_stream, name='board_stream'),
+    path('fids/', fids, name='fids'),
+    path('autocomplete/<str:name>/', autocomplete, name='autocomplete'),
     path('logout/', auth_views.LogoutView.as_view(template_name='registration/logout.html'), name='logout'),
     path('profile', profile, name='profile'),
 
@@ -61,9 +65,13 @@ urlpatterns = [
     path('gates/flight/<int:cf_id>/delete/', gate_flight_delete, name='gate_flight_delete'),
 
     path('flights/<int:flight_id>/time/', flight_time_edit, name='flight_time_edit'),
+    path('flights/<int:flight_id>/manifest/', flight_manifest, name='flight_manifest'),
+    path('flights/<int:flight_id>/manifest.json', flight_manifest_json, name='flight_manifest_json'),
+    path('flights/<int:flight_id>/manifest/export/', flight_manifest_export, name='flight_manifest_export'),
 
     path('passengers', passengers, name='passengers'),
     path('passengers/add', passenger_add, name='passenger_add'),
+    path('passengers/search', passenger_search, name='passenger_search'),
     path('passengers/<int:passenger_id>', passenger_edit, name='passenger_edit'),
     path('passengers/<int:passenger_id>/delete', passenger_delete, name='passenger_delete'),
     path('passengers/import/', passenger_import, name='passenger_import'),
@@ -76,6 +84,9 @@ urlpatterns = [
 
     path('passengers/<int:passenger_id>/boarding-pass', boarding_pass_edit, name='boarding_pass_edit'),
 
+    path('imports/<int:job_id>/', import_job_status, name='import_job_status'),
+    path('imports/<int:job_id>/resume/', import_job_resume, name='import_job_resume'),
+
     path('backups/', backup_list, name='backup_list'),
     path('backups/create/', create_backup, name='create_backup'),
     path('backups/<int:backup_id>/delete/', backup_delete, name='backup_delete'),
@@ -0,0 +1,89 @@
+import hashlib
+import time
+from functools import wraps
+from typing import Callable
+
+from django.contrib import messages
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Model
+from django.http import HttpRequest
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+AUTH_VERSION_LABEL = 'auth'
+
+def _version_key(label: str) -> str:
+    return f'table_version:{label}'
+
+def model_label(model: type[Model] | str) -> str:
+    if isinstance(model, str):
+        return model.lower()
+    return model._meta.label_lower
+
+def bump_table_version(label: str):
+    cache.set(_version_key(label), time.time_ns(), timeout=None)
+
+def _current_versions(keys: dict[str, object]) -> dict:
+    versions = {keys[key]: value for key, value in cache.get_many(list(keys)).items()}
+
+    missing = {key: time.time_ns() for key, name in keys.items() if name not in versions}
+    for key, value in missing.items():
+        if not cache.add(key, value, timeout=None):
+            value = cache.get(key, value)
+        versions[keys[key]] = value
+
+    return versions
+
+def table_versions(labels: list[str]) -> dict[str, int]:
+    return _current_versions({_version_key(label): label for label in labels})
+
+def _row_version_key(label: str, pk) -> str:
+    return f'row_version:{label}:{pk}'
+
+def bump_row_version(label: str, pk):
+    cache.set(_row_version_key(label, pk), time.time_ns(), timeout=None)
+
+def row_versions(model: type[Model] | str, pks: list) -> dict:
+    label = model_label(model)
+    return _current_versions({_row_version_key(label, pk): pk for pk in pks})
+
+def invalidate_table(sender, **kwargs):
+    label = model_label(sender)
+    transaction.on_commit(lambda: bump_table_version(label))
+
+def invalidate_row(label: str, pk):
+    transaction.on_commit(lambda: bump_row_version(label, pk))
+
+def invalidate_auth(**kwargs):
+    transaction.on_commit(lambda: bump_table_version(AUTH_VERSION_LABEL))
+
+def conditional_page(*models: type[Model] | str, vary: Callable[[HttpRequest], str] | None = None):
+    """ETag and Last-Modified from the table versions of `models`; `vary` adds request state the page depends on besides them."""
+    labels = sorted({model_label(model) for model in models} | {AUTH_VERSION_LABEL})
+
+    def decorator(view_func):
+        @wraps(view_func)
+        def _wrapped_view(request: HttpRequest, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD') or len(messages.get_messages(request)):
+                return view_func(request, *args, **kwargs)
+
+            versions = table_versions(labels)
+            fingerprint = ';'.join(f'{label}={versions[label]}' for label in labels)
+            fingerprint += f';user={request.user.pk};{request.get_full_path()}'
+            if vary:
+                fingerprint += f';{vary(request)}'
+            etag = f'"{hashlib.md5(fingerprint.encode()).hexdigest()}"'
+            last_modified = max(versions.values()) // 1_000_000_000
+
+            response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+            if response is None:
+                response = view_func(request, *args, **kwargs)
+                if response.status_code == 200:
+                    response.headers.setdefault('ETag', etag)
+                    response.headers.setdefault('Last-Modified', http_date(last_modified))
+
+            patch_cache_control(response, private=True, no_cache=True)
+            return response
+        return _wrapped_view
+    return decorator
@@ -1,15 +1,14 @@
 import csv
 from datetime import datetime
 from functools import wraps
-import io
 import json
 import os
 from typing import Literal
-from django.http import HttpRequest, HttpResponse, JsonResponse
+from django.http import Http404, HttpRequest, HttpResponse, JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
+from django.urls import reverse
 from django.contrib import messages
 from django.contrib.auth.models import Group
-from django.contrib.auth.hashers import make_password
 from django.db.models import Count, Avg, Sum, Q
 from django.db import transaction
 from django.contrib.admin.models import LogEntry, ADDITION, CHANGE, DELETION
@@ -23,6 +22,15 @@ from django.conf import settings
 
 from dbapp.models import *
 from webapp.forms import *
+from webapp.artifacts import serve_board_artifact
+from webapp.autocomplete import AUTOCOMPLETES
+from webapp.board import board_context, board_events, board_snapshot, board_window_tag, fids_feed
+from webapp.encryption import DECRYPT_WORKERS, iter_decrypted
+from webapp.import_jobs import create_import_job, import_job_state, import_permission, start_import_job
+from webapp.importing import IMPORTERS
+from webapp.listing import Listing, choice_filter, prefix_filter, words_filter
+from webapp.manifest import manifest_csv, manifest_passengers, manifest_row, manifest_summary
+from webapp.versions import conditional_page, row_versions
 
 # Create your views here.
 def log_action(user, instance, action_flag: int, old_instance = None, change_message: str | None = None):
@@ -111,14 +119,113 @@ def permission_required(
         return _wrapped_view
     return decorator
 
+def import_page(request: HttpRequest, form_class: type[BaseImportForm], kind: str, context: dict):
+    if request.method == 'POST':
+        form = form_class(request.POST, request.FILES)
+        if form.is_valid():
+            try:
+                job = create_import_job(
+                    kind, form.cleaned_data['csv_file'], request.user, form.cleaned_data['dry_run'] # type: ignore
+                )
+                return redirect(f'{request.path}?job={job.pk}')
+            except Exception as e:
+                messages.error(request, f'Ошибка импорта: {str(e)}')
+    else:
+        form = form_class()
+
+    job = None
+    job_id = request.GET.get('job', '')
+    if job_id.isdigit():
+        job = ImportJob.objects.filter(pk=job_id, kind=kind, created_by=request.user).first()
+
+    return render(request, 'import_form.html', {
+        'form': form,
+        'job': job,
+        'noun': IMPORTERS[kind].noun,
+        **context
+    })
+
+@permission_required()
+def import_job_status(request: HttpRequest, job_id: int):
+    job = get_object_or_404(ImportJob, pk=job_id)
+    if job.created_by_id != request.user.pk and not request.user.is_superuser: # type: ignore
+        raise Http404
+    return JsonResponse(import_job_state(job))
+
+@permission_required()
+def import_job_resume(request: HttpRequest, job_id: int):
+    job = get_object_or_404(ImportJob, pk=job_id, kind__in=IMPORTERS)
+    if job.created_by_id != request.user.pk and not request.user.is_superuser: # type: ignore
+        raise Http404
+
+    response = check_permission(request, import_permission(job.kind))
+    if response:
+        return response
+
+    if request.method == 'POST':
+        # The row lock makes the error -> pending transition happen once, however many requests race for it
+        with transaction.atomic():
+            job = ImportJob.objects.select_for_update().get(pk=job.pk)
+            if import_job_state(job)['resumable']:
+                job.status = 'pending'
+                job.save(update_fields=['status'])
+                transaction.on_commit(lambda: start_import_job(job.pk))
+            else:
+                messages.error(request, 'Этот импорт нельзя продолжить')
+
+    return redirect(f"{reverse(f'{job.kind}_import')}?job={job.pk}")
+
+@conditional_page(
+    'dbapp.Flight', 'dbapp.FlightTime', 'dbapp.FlightStatus',
+    'dbapp.Airplane', 'dbapp.Airline', 'dbapp.Airport',
+    vary=board_window_tag,
+)
 def index(request: HttpRequest):
-    return render(request, 'index.html', 
-        {
-            'flights': Flight.objects.all(),
-            'airports': Airport.objects.all(),
-            'statuses': FlightStatus.objects.all(),
-        }
-    )
+    if not request.GET and not request.user.is_authenticated:
+        response = serve_board_artifact(request, 'index.html', 'text/html; charset=utf-8')
+        if response:
+            return response
+
+    return render(request, 'index.html', board_context(board_snapshot(request.GET)))
+
+def board_json(request: HttpRequest):
+    if not request.GET and not request.user.is_authenticated:
+        response = serve_board_artifact(request, 'board.json', 'application/json')
+        if response:
+            return response
+
+    return JsonResponse(board_snapshot(request.GET))
+
+async def board_stream(request: HttpRequest):
+    try:
+        last_seen = int(request.headers.get('Last-Event-ID') or request.GET.get('since', ''))
+    except ValueError:
+        last_seen = None
+
+    response = StreamingHttpResponse(board_events(last_seen), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+def fids(request: HttpRequest):
+    direction = request.GET.get('type', 'all')
+    try:
+        since = int(request.GET['since'])
+        window_start = int(request.GET['window'])
+    except (KeyError, ValueError):
+        since = window_start = None
+
+    return JsonResponse(fids_feed(direction, since, window_start))
+
+def autocomplete(request: HttpRequest, name: str):
+    autocomplete = AUTOCOMPLETES.get(name)
+    if autocomplete is None:
+        raise Http404
+    response = check_permission(request, autocomplete.permissions)
+    if response:
+        return response
+
+    return JsonResponse(autocomplete.results(request.GET))
 
 @permission_required()
 def profile(request: HttpRequest):
@@ -136,12 +243,23 @@ def profile(request: HttpRequest):
         'group_names': group_names
     })
 
+WORKER_LISTING = Listing(
+    Worker,
+    sorts={'last_name': 'Фамилия', 'username': 'Логин', 'date_joined': 'Дата приёма'},
+    default_sort='last_name',
+    filters={
+        'fio': words_filter('last_name', 'first_name', 'middle_name'),
+        'phone': lambda value: Q(phone_hash=blind_index(value)),
+        'position': lambda value: Q(pk__in=Worker.objects.filter(groups__name__icontains=value).values('pk')),
+    },
+    related=['groups'],
+)
+
 @permission_required('dbapp.view_worker')
+@conditional_page('dbapp.Worker')
 def workers(request: HttpRequest):
-    workers = Worker.objects.all().prefetch_related('groups')
-    for w in workers:
-        w.group_names = ", ".join(w.groups.values_list("name", flat=True)) # type: ignore
-    return render(request, 'workers.html', {'workers': workers})
+    listing = WORKER_LISTING.page(request.GET)
+    return render(request, 'workers.html', {'workers': listing['items'], 'listing': listing})
 
 @transaction.atomic
 @permission_required('dbapp.add_worker')
@@ -217,70 +335,7 @@ def worker_delete(request: HttpRequest, worker_id: int):
 
 @permission_required('dbapp.add_worker')
 def worker_import(request: HttpRequest):
-    if request.method == 'POST':
-        form = WorkerImportForm(request.POST, request.FILES)
-        if form.is_valid():
-            try:
-                csv_file = form.cleaned_data['csv_file']
-                csv_text = csv_file.read().decode('utf-8-sig')
-                io_string = io.StringIO(csv_text)
-                
-                imported_count = 0
-                errors = []
-                
-                with transaction.atomic():
-                    reader = csv.DictReader(io_string, delimiter=';')
-                    
-                    for row_num, row in enumerate(reader, start=2):
-                        try:
-                            worker, created = Worker.objects.get_or_create(
-                                username=row['username'],
-                                defaults={
-                                    'last_name': row['last_name'],
-                                    'first_name': row['first_name'],
-                                    'email': row['email'],
-                                    'is_active': row.get('is_active', 'True').lower() == 'true',
-                                    'is_staff': row.get('is_staff', 'False').lower() == 'true',
-                                }
-                            )
-                            
-                            worker.middle_name = row.get('middle_name', '')
-                            if 'phone' in row and row['phone']:
-                                worker.phone = row['phone']
-                            
-                            if 'password' in row and row['password']:
-                                worker.password = make_password(row['password'])
-                            elif created:
-                                worker.set_password('supersecretpassword')
-                            
-                            worker.save()
-                            
-                            if 'groups' in row and row['groups']:
-                                group_names = [name.strip() for name in row['groups'].split(',')]
-                                groups = Group.objects.filter(name__in=group_names)
-                                worker.groups.set(groups)
-                            
-                            imported_count += 1
-                            
-                        except Exception as e:
-                            errors.append(f"Строка {row_num}: {str(e)}")
-                
-                if errors:
-                    messages.error(request, f'Импорт завершен с ошибками. Успешно: {imported_count}')
-                    for error in errors:
-                        messages.error(request, error)
-                else:
-                    messages.success(request, f'Успешно импортировано {imported_count} сотрудников')
-                    
-                return redirect('workers')
-                
-            except Exception as e:
-                messages.error(request, f'Ошибка импорта: {str(e)}')
-    else:
-        form = WorkerImportForm()
-    
-    return render(request, 'import_form.html', {
-        'form': form,
+    return import_page(request, WorkerImportForm, 'worker', {
         'title': 'Импорт сотрудников из CSV',
         'export_url': 'worker_export',
         'back_url': 'workers'
@@ -300,9 +355,8 @@ def worker_export(request: HttpRequest):
         'email', 'phone', 'groups', 'is_active', 'is_staff'
     ])
     
-    workers = Worker.objects.all().prefetch_related('groups')
+    workers = iter_decrypted(Worker.objects.prefetch_related('groups'), ['phone'], workers=DECRYPT_WORKERS)
     for worker in workers:
-        group_names = ', '.join(worker.groups.values_list('name', flat=True))
         writer.writerow([
             worker.username,
             worker.last_name,
@@ -310,14 +364,26 @@ def worker_export(request: HttpRequest):
             worker.middle_name or '',
             worker.email,
             worker.phone or '',
-            group_names,
+            worker.group_names,
             'True' if worker.is_active else 'False',
             'True' if worker.is_staff else 'False',
         ])
     
     return response
 
+CHECK_IN_DESK_LISTING = Listing(
+    CheckInDesk,
+    sorts={'number': 'Номер'},
+    default_sort='number',
+    filters={
+        'desk': 'number__icontains',
+        'worker': words_filter('worker__last_name', 'worker__first_name', 'worker__middle_name'),
+    },
+    related=['worker'],
+)
+
 @permission_required(['dbapp.view_checkindesk', 'dbapp.view_own_checkindesk'])
+@conditional_page('dbapp.CheckInDesk', 'dbapp.Worker')
 def check_in_desks(request: HttpRequest):
     if request.user.has_perm('dbapp.view_checkindesk'): #type: ignore
         check_in_desks_data = CheckInDesk.objects.all()
@@ -326,10 +392,12 @@ def check_in_desks(request: HttpRequest):
         check_in_desks_data = CheckInDesk.objects.filter(worker=request.user)
         only_own_desks = True
 
+    listing = CHECK_IN_DESK_LISTING.page(request.GET, check_in_desks_data)
     return render(request, 'check_in_desks.html', 
 {
-            'check_in_desks': check_in_desks_data,
-            'only_own_desks': only_own_desks    
+            'check_in_desks': listing['items'],
+            'only_own_desks': only_own_desks,
+            'listing': listing,
         }
     )
 
@@ -421,7 +489,19 @@ def check_in_desk_delete(request: HttpRequest, check_in_desk_id: int):
     messages.success(request, "Стойка регистрации успешно удалена!")
     return redirect('check_in_desks')
 
+GATE_LISTING = Listing(
+    Gate,
+    sorts={'number': 'Номер'},
+    default_sort='number',
+    filters={
+        'gate': 'number__icontains',
+        'worker': words_filter('worker__last_name', 'worker__first_name', 'worker__middle_name'),
+    },
+    related=['worker'],
+)
+
 @permission_required(['dbapp.view_gate', 'dbapp.view_own_gate'])
+@conditional_page('dbapp.Gate', 'dbapp.Worker')
 def gates(request: HttpRequest):
     if request.user.has_perm('dbapp.view_gate'): #type: ignore
         gates_data = Gate.objects.all()
@@ -430,10 +510,12 @@ def gates(request: HttpRequest):
         gates_data = Gate.objects.filter(worker=request.user)
         only_own_gates = True
 
+    listing = GATE_LISTING.page(request.GET, gates_data)
     return render(request, 'gates.html', 
 {
-            'gates': gates_data,
-            'only_own_gates': only_own_gates    
+            'gates': listing['items'],
+            'only_own_gates': only_own_gates,
+            'listing': listing,
         }
     )
 
@@ -525,9 +607,21 @@ def gate_delete(request: HttpRequest, gate_id: int):
     messages.success(request, "Посадочный выход успешно удалён!")
     return redirect('gates')
 
+AIRLINE_LISTING = Listing(
+    Airline,
+    sorts={'name': 'Название', 'IATA_code': 'Код IATA'},
+    default_sort='name',
+    filters={
+        'name': 'name__icontains',
+        'code': lambda value: Q(IATA_code__icontains=value) | Q(ICAO_code__icontains=value),
+    },
+)
+
 @permission_required('dbapp.view_airline')
+@conditional_page('dbapp.Airline')
 def airlines(request: HttpRequest):
-    return render(request, 'airlines.html', {'airlines': Airline.objects.all()})
+    listing = AIRLINE_LISTING.page(request.GET)
+    return render(request, 'airlines.html', {'airlines': listing['items'], 'listing': listing})
 
 @transaction.atomic
 @permission_required('dbapp.add_airline')
@@ -597,76 +691,7 @@ def airline_delete(request: HttpRequest, airline_id: int):
 
 @permission_required('dbapp.add_airline')
 def airline_import(request: HttpRequest):
-    if request.method == 'POST':
-        form = AirlineImportForm(request.POST, request.FILES)
-        if form.is_valid():
-            try:
-                csv_file = form.cleaned_data['csv_file']
-                csv_text = csv_file.read().decode('utf-8-sig')
-                
-                imported_count = 0
-                errors = []
-                
-                with transaction.atomic():
-                    lines = csv_text.strip().split('\n')
-                    headers = [header.strip() for header in lines[0].split(';')]
-                    
-                    for line_num, line in enumerate(lines[1:], start=2):
-                        try:
-                            if not line.strip():
-                                continue
-                                
-                            values = [value.strip() for value in line.split(';')]
-                            if len(values) != len(headers):
-                                errors.append(f"Строка {line_num}: Неверное количество колонок")
-                                continue
-                            
-                            row = dict(zip(headers, values))
-                            
-                            if not all(row.get(field) for field in ['name', 'IATA_code', 'ICAO_code']):
-                                errors.append(f"Строка {line_num}: Отсутствуют обязательные поля")
-                                continue
-                            
-                            airline, created = Airline.objects.get_or_create(
-                                IATA_code=row['IATA_code'],
-                                defaults={
-                                    'name': row['name'],
-                                    'ICAO_code': row['ICAO_code'],
-                                    'contact_person': row.get('contact_person', ''),
-                                    'contact_phone': row.get('contact_phone', ''),
-                                    'contact_email': row.get('contact_email', ''),
-                                }
-                            )
-                            
-                            if not created:
-                                airline.name = row['name']
-                                airline.ICAO_code = row['ICAO_code']
-                                airline.contact_person = row.get('contact_person', '')
-                                airline.contact_phone = row.get('contact_phone', '')
-                                airline.contact_email = row.get('contact_email', '')
-                                airline.save()
-                            
-                            imported_count += 1
-                            
-                        except Exception as e:
-                            errors.append(f"Строка {line_num}: {str(e)}")
-                
-                if errors:
-                    messages.error(request, f'Импорт завершен с ошибками. Успешно: {imported_count}')
-                    for error in errors[:5]:
-                        messages.error(request, error)
-                else:
-                    messages.success(request, f'Успешно импортировано {imported_count} авиакомпаний')
-                    
-                return redirect('airlines')
-                
-            except Exception as e:
-                messages.error(request, f'Ошибка импорта: {str(e)}')
-    else:
-        form = AirlineImportForm()
-    
-    return render(request, 'import_form.html', {
-        'form': form,
+    return import_page(request, AirlineImportForm, 'airline', {
         'title': 'Импорт авиакомпаний из CSV',
         'export_url': 'airline_export',
         'back_url': 'airlines'
@@ -693,9 +718,22 @@ def airline_export(request: HttpRequest):
     
     return response
 
+AIRPLANE_LISTING = Listing(
+    Airplane,
+    sorts={'name': 'Модель', 'tail_number': 'Бортовой номер', 'airline__name': 'Авиакомпания'},
+    default_sort='name',
+    filters={
+        'airplane': words_filter('name', 'tail_number'),
+        'airline': 'airline__name__icontains',
+    },
+    related=['airline'],
+)
+
 @permission_required('dbapp.view_airplane')
+@conditional_page('dbapp.Airplane', 'dbapp.Airline')
 def airplanes(request: HttpRequest):
-    return render(request, 'airplanes.html', {'airplanes': Airplane.objects.all()})
+    listing = AIRPLANE_LISTING.page(request.GET)
+    return render(request, 'airplanes.html', {'airplanes': listing['items'], 'listing': listing})
 
 @transaction.atomic
 @permission_required('dbapp.add_airplane')
@@ -765,80 +803,7 @@ def airplane_delete(request: HttpRequest, airplane_id: int):
 
 @permission_required('dbapp.add_airplane')
 def airplane_import(request: HttpRequest):
-    if request.method == 'POST':
-        form = AirplaneImportForm(request.POST, request.FILES)
-        if form.is_valid():
-            try:
-                csv_file = form.cleaned_data['csv_file']
-                csv_text = csv_file.read().decode('utf-8-sig')
-                
-                imported_count = 0
-                errors = []
-                
-                with transaction.atomic():
-                    lines = csv_text.strip().split('\n')
-                    headers = [header.strip() for header in lines[0].split(';')]
-                    
-                    for line_num, line in enumerate(lines[1:], start=2):
-                        try:
-                            if not line.strip():
-                                continue
-                                
-                            values = [value.strip() for value in line.split(';')]
-                            if len(values) != len(headers):
-                                errors.append(f"Строка {line_num}: Неверное количество колонок")
-                                continue
-                            
-                            row = dict(zip(headers, values))
-                            
-                            if not all(row.get(field) for field in ['tail_number', 'name', 'airline', 'layout', 'rows']):
-                                errors.append(f"Строка {line_num}: Отсутствуют обязательные поля")
-                                continue
-                            
-                            try:
-                                airline = Airline.objects.get(name=row['airline'])
-                            except Airline.DoesNotExist:
-                                errors.append(f"Строка {line_num}: Авиакомпания '{row['airline']}' не найдена")
-                                continue
-                            
-                            airplane, created = Airplane.objects.get_or_create(
-                                tail_number=row['tail_number'],
-                                defaults={
-                                    'name': row['name'],
-                                    'airline': airline,
-                                    'layout': row['layout'],
-                                    'rows': int(row['rows']),
-                                }
-                            )
-                            
-                            if not created:
-                                airplane.name = row['name']
-                                airplane.airline = airline
-                                airplane.layout = row['layout']
-                                airplane.rows = int(row['rows'])
-                                airplane.save()
-                            
-                            imported_count += 1
-                            
-                        except Exception as e:
-                            errors.append(f"Строка {line_num}: {str(e)}")
-                
-                if errors:
-                    messages.error(request, f'Импорт завершен с ошибками. Успешно: {imported_count}')
-                    for error in errors[:5]:
-                        messages.error(request, error)
-                else:
-                    messages.success(request, f'Успешно импортировано {imported_count} самолетов')
-                    
-                return redirect('airplanes')
-                
-            except Exception as e:
-                messages.error(request, f'Ошибка импорта: {str(e)}')
-    else:
-        form = AirplaneImportForm()
-    
-    return render(request, 'import_form.html', {
-        'form': form,
+    return import_page(request, AirplaneImportForm, 'airplane', {
         'title': 'Импорт самолетов из CSV',
         'export_url': 'airplane_export',
         'back_url': 'airplanes'
@@ -864,9 +829,21 @@ def airplane_export(request: HttpRequest):
     
     return response
 
+AIRPORT_LISTING = Listing(
+    Airport,
+    sorts={'name': 'Название', 'IATA_code': 'Код IATA'},
+    default_sort='name',
+    filters={
+        'name': 'name__icontains',
+        'code': lambda value: Q(IATA_code__icontains=value) | Q(ICAO_code__icontains=value),
+    },
+)
+
 @permission_required('dbapp.view_airport')
+@conditional_page('dbapp.Airport')
 def airports(request: HttpRequest):
-    return render(request, 'airports.html', {'airports': Airport.objects.all()})
+    listing = AIRPORT_LISTING.page(request.GET)
+    return render(request, 'airports.html', {'airports': listing['items'], 'listing': listing})
 
 @transaction.atomic
 @permission_required('dbapp.add_airport')
@@ -936,70 +913,7 @@ def airport_delete(request: HttpRequest, airport_id: int):
 
 @permission_required('dbapp.add_airport')
 def airport_import(request: HttpRequest):
-    if request.method == 'POST':
-        form = AirportImportForm(request.POST, request.FILES)
-        if form.is_valid():
-            try:
-                csv_file = form.cleaned_data['csv_file']
-                csv_text = csv_file.read().decode('utf-8-sig')
-                
-                imported_count = 0
-                errors = []
-                
-                with transaction.atomic():
-                    lines = csv_text.strip().split('\n')
-                    headers = [header.strip() for header in lines[0].split(';')]
-                    
-                    for line_num, line in enumerate(lines[1:], start=2):
-                        try:
-                            if not line.strip():
-                                continue
-                                
-                            values = [value.strip() for value in line.split(';')]
-                            if len(values) != len(headers):
-                                errors.append(f"Строка {line_num}: Неверное количество колонок")
-                                continue
-                            
-                            row = dict(zip(headers, values))
-                            
-                            if not all(row.get(field) for field in ['name', 'IATA_code', 'ICAO_code']):
-                                errors.append(f"Строка {line_num}: Отсутствуют обязательные поля")
-                                continue
-                            
-                            airport, created = Airport.objects.get_or_create(
-                                IATA_code=row['IATA_code'],
-                                defaults={
-                                    'name': row['name'],
-                                    'ICAO_code': row['ICAO_code'],
-                                }
-                            )
-                            
-                            if not created:
-                                airport.name = row['name']
-                                airport.ICAO_code = row['ICAO_code']
-                                airport.save()
-                            
-                            imported_count += 1
-                            
-                        except Exception as e:
-                            errors.append(f"Строка {line_num}: {str(e)}")
-                
-                if errors:
-                    messages.error(request, f'Импорт завершен с ошибками. Успешно: {imported_count}')
-                    for error in errors[:5]:
-                        messages.error(request, error)
-                else:
-                    messages.success(request, f'Успешно импортировано {imported_count} аэропортов')
-                    
-                return redirect('airports')
-                
-            except Exception as e:
-                messages.error(request, f'Ошибка импорта: {str(e)}')
-    else:
-        form = AirportImportForm()
-    
-    return render(request, 'import_form.html', {
-        'form': form,
+    return import_page(request, AirportImportForm, 'airport', {
         'title': 'Импорт аэропортов из CSV',
         'export_url': 'airport_export',
         'back_url': 'airports'
@@ -1023,9 +937,62 @@ def airport_export(request: HttpRequest):
     
     return response
 
+FLIGHT_LISTING = Listing(
+    Flight,
+    sorts={'boardflight__board_time': 'Время', 'number': 'Номер'},
+    default_sort='-boardflight__board_time',
+    filters={
+        'number': 'boardflight__code__icontains',
+        'status': 'boardflight__status_name__icontains',
+    },
+    related=['boardflight'],
+)
+
 @permission_required('dbapp.view_flight')
+@conditional_page('dbapp.Flight', 'dbapp.FlightStatus', 'dbapp.Airplane', 'dbapp.Airline')
 def flights(request: HttpRequest):
-    return render(request, 'flights.html', {'flights': Flight.objects.all()})
+    listing = FLIGHT_LISTING.page(request.GET)
+    return render(request, 'flights.html', {'flights': listing['items'], 'listing': listing})
+
+MANIFEST_MODELS = ('dbapp.Passenger', 'dbapp.BoardingPass', 'dbapp.Baggage', 'dbapp.Flight', 'dbapp.Airplane', 'dbapp.Airline')
+
+@permission_required('dbapp.view_passenger')
+@conditional_page(*MANIFEST_MODELS)
+def flight_manifest(request: HttpRequest, flight_id: int):
+    flight = get_object_or_404(Flight.objects.select_related('boardflight'), pk=flight_id)
+    passengers = list(manifest_passengers(flight_id))
+
+    return render(request, 'manifest.html', {
+        'flight': flight,
+        'passengers': passengers,
+        'summary': manifest_summary(passengers),
+    })
+
+@permission_required('dbapp.view_passenger')
+@conditional_page(*MANIFEST_MODELS)
+def flight_manifest_json(request: HttpRequest, flight_id: int):
+    flight = get_object_or_404(Flight.objects.select_related('boardflight'), pk=flight_id)
+    passengers = list(manifest_passengers(flight_id))
+
+    return JsonResponse({
+        'flight': {
+            'id': flight.pk,
+            'code': flight.boardflight.code, # type: ignore
+            'planned_departure': flight.planned_departure,
+            'planned_arrival': flight.planned_arrival,
+            'status': flight.boardflight.status_name, # type: ignore
+        },
+        'summary': manifest_summary(passengers),
+        'passengers': [manifest_row(passenger) for passenger in passengers],
+    })
+
+@permission_required('dbapp.view_passenger')
+def flight_manifest_export(request: HttpRequest, flight_id: int):
+    flight = get_object_or_404(Flight.objects.select_related('boardflight'), pk=flight_id)
+
+    response = StreamingHttpResponse(manifest_csv(flight_id), content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="manifest_{flight.boardflight.code.replace(" ", "")}.csv"' # type: ignore
+    return response
 
 @transaction.atomic
 @permission_required('dbapp.add_flight')
@@ -1043,15 +1010,9 @@ def flight_add(request: HttpRequest):
     else:
         form = FlightForm()
 
-    iata_codes = {
-        airplane.pk: airplane.airline.IATA_code
-        for airplane in Airplane.objects.select_related('airline').all()
-    }
-
     return render(request, 'flight_form.html', {
         'form': form,
         'title': 'Добавить рейс',
-        'iata_codes': iata_codes,
         'hide_status': True
     })
 
@@ -1091,15 +1052,9 @@ def flight_edit(request: HttpRequest, flight_id: int):
             if not can_change_flight_status:
                 form.fields['flight_status'].disabled = True
     
-    iata_codes = {
-        airplane.pk: airplane.airline.IATA_code
-        for airplane in Airplane.objects.select_related('airline').all()
-    }
-
     return render(request, 'flight_form.html', {
         'form': form,
         'title': f'Редактировать рейс: {flight}',
-        'iata_codes': iata_codes,
         'hide_status': False
     })
 
@@ -1121,123 +1076,7 @@ def flight_delete(request: HttpRequest, flight_id: int):
 
 @permission_required('dbapp.add_flight')
 def flight_import(request: HttpRequest):
-    if request.method == 'POST':
-        form = FlightImportForm(request.POST, request.FILES)
-        if form.is_valid():
-            try:
-                csv_file = form.cleaned_data['csv_file']
-                csv_text = csv_file.read().decode('utf-8-sig')
-                
-                imported_count = 0
-                errors = []
-                
-                with transaction.atomic():
-                    lines = csv_text.strip().split('\n')
-                    headers = [header.strip() for header in lines[0].split(';')]
-                    
-                    for line_num, line in enumerate(lines[1:], start=2):
-                        try:
-                            if not line.strip():
-                                continue
-                                
-                            values = [value.strip() for value in line.split(';')]
-                            if len(values) != len(headers):
-                                errors.append(f"Строка {line_num}: Неверное количество колонок")
-                                continue
-                            
-                            row = dict(zip(headers, values))
-
-                            def clean_value(value):
-                                if not value:
-                                    return value
-                                cleaned = value.replace('\ufeff', '').strip()
-                                cleaned = cleaned.replace('\u200b', '').replace('\uFEFF', '')
-                                return cleaned
-                            
-                            cleaned_row = {key: clean_value(value) for key, value in row.items()}
-                            
-                            if not all(cleaned_row.get(field) for field in ['number', 'airplane', 'departure_airport', 'arrival_airport', 'flight_status']):
-                                errors.append(f"Строка {line_num}: Отсутствуют обязательные поля")
-                                continue
-                            
-                            try:
-                                airplane = Airplane.objects.get(tail_number=cleaned_row['airplane'])
-                            except Airplane.DoesNotExist:
-                                errors.append(f"Строка {line_num}: Самолет '{cleaned_row['airplane']}' не найден")
-                                continue
-                                
-                            try:
-                                departure_airport = Airport.objects.get(IATA_code=row['departure_airport'])
-                            except Airport.DoesNotExist:
-                                errors.append(f"Строка {line_num}: Аэропорт вылета '{cleaned_row['departure_airport']}' не найден")
-                                continue
-                                
-                            try:
-                                arrival_airport = Airport.objects.get(IATA_code=cleaned_row['arrival_airport'])
-                            except Airport.DoesNotExist:
-                                errors.append(f"Строка {line_num}: Аэропорт прибытия '{cleaned_row['arrival_airport']}' не найден")
-                                continue
-                                
-                            try:
-                                flight_status = FlightStatus.objects.get(name=cleaned_row['flight_status'])
-                            except FlightStatus.DoesNotExist:
-                                errors.append(f"Строка {line_num}: Статус рейса '{cleaned_row['flight_status']}' не найден")
-                                continue
-                            
-                            def parse_custom_datetime(datetime_str):
-                                if not datetime_str or datetime_str.strip() == '':
-                                    return None
-                                try:
-                                    return datetime.strptime(datetime_str.strip(), '%d.%m.%Y %H:%M')
-                                except ValueError:
-                                   return None
-                            
-                            planned_departure = parse_custom_datetime(cleaned_row.get('planned_departure'))
-                            planned_arrival = parse_custom_datetime(cleaned_row.get('planned_arrival'))
-                            
-                            if cleaned_row.get('planned_departure') and not planned_departure:
-                                errors.append(f"Строка {line_num}: Неверный формат даты вылета '{cleaned_row['planned_departure']}'. Ожидается: ДД.ММ.ГГГГ ЧЧ:ММ")
-                                continue
-                                
-                            if cleaned_row.get('planned_arrival') and not planned_arrival:
-                                errors.append(f"Строка {line_num}: Неверный формат даты прибытия '{cleaned_row['planned_arrival']}'. Ожидается: ДД.ММ.ГГГГ ЧЧ:ММ")
-                                continue
-                            
-                            if planned_departure and planned_arrival and planned_arrival < planned_departure:
-                                errors.append(f"Строка {line_num}: Дата прибытия не может быть раньше даты вылета")
-                                continue
-                            
-                            Flight.objects.create(
-                                number=int(cleaned_row['number']),
-                                airplane=airplane,
-                                planned_departure=planned_departure,
-                                planned_arrival=planned_arrival,
-                                departure_airport=departure_airport,
-                                arrival_airport=arrival_airport,
-                                flight_status=flight_status,
-                            )
-                            
-                            imported_count += 1
-                            
-                        except Exception as e:
-                            errors.append(f"Строка {line_num}: {str(e)}")
-                
-                if errors:
-                    messages.error(request, f'Импорт завершен с ошибками. Успешно: {imported_count}')
-                    for error in errors[:5]:
-                        messages.error(request, error)
-                else:
-                    messages.success(request, f'Успешно импортировано {imported_count} рейсов')
-                    
-                return redirect('flights')
-                
-            except Exception as e:
-                messages.error(request, f'Ошибка импорта: {str(e)}')
-    else:
-        form = FlightImportForm()
-    
-    return render(request, 'import_form.html', {
-        'form': form,
+    return import_page(request, FlightImportForm, 'flight', {
         'title': 'Импорт рейсов из CSV',
         'export_url': 'flight_export',
         'back_url': 'flights'
@@ -1267,6 +1106,7 @@ def flight_export(request: HttpRequest):
     return response
 
 @permission_required(['dbapp.change_checkindeskflight', 'dbapp.change_is_active_checkindeskflight'])
+@conditional_page('dbapp.CheckInDesk', 'dbapp.CheckInDeskFlight', 'dbapp.Flight', 'dbapp.Airplane', 'dbapp.Airline')
 def check_in_desk_flights(request: HttpRequest, check_in_desk_id: int):
     desk = get_object_or_404(CheckInDesk, pk=check_in_desk_id)
 
@@ -1301,6 +1141,7 @@ def check_in_desk_flights(request: HttpRequest, check_in_desk_id: int):
     assigned_flights = CheckInDeskFlight.objects.filter(desk=desk)
 
     form.fields['flight'].queryset = available_flights # type: ignore
+    form.fields['flight'].widget.params = {'desk': desk.pk} # type: ignore
 
     return render(request, 'check_in_desk_flights.html', {
         'desk': desk,
@@ -1348,6 +1189,7 @@ def check_in_desk_flight_delete(request: HttpRequest, cf_id: int):
     return redirect('check_in_desk_flights', check_in_desk_id=desk_id)
 
 @permission_required(['dbapp.change_gateflight', 'dbapp.change_is_active_gateflight'])
+@conditional_page('dbapp.Gate', 'dbapp.GateFlight', 'dbapp.Flight', 'dbapp.Airplane', 'dbapp.Airline')
 def gate_flights(request: HttpRequest, gate_id: int):
     gate = get_object_or_404(Gate, pk=gate_id)
 
@@ -1382,6 +1224,7 @@ def gate_flights(request: HttpRequest, gate_id: int):
     assigned_flights = GateFlight.objects.filter(gate=gate)
 
     form.fields['flight'].queryset = available_flights # type: ignore
+    form.fields['flight'].widget.params = {'gate': gate.pk} # type: ignore
 
     return render(request, 'gate_flights.html', {
         'gate': gate,
@@ -1486,9 +1329,63 @@ def flight_time_edit(request: HttpRequest, flight_id: int):
         'title': f'Редактировать временные метки рейса {flight}'
     })
 
+PASSENGER_LISTING = Listing(
+    Passenger,
+    sorts={'last_name': 'Фамилия', 'flight__boardflight__board_time': 'Время рейса'},
+    default_sort='last_name',
+    filters={
+        'passenger': prefix_filter('last_name', 'first_name', 'middle_name'),
+        'passport': lambda value: Q(passport_hash=blind_index(value)),
+        'flight': 'flight__boardflight__code__icontains',
+        'check_in': choice_filter('check_in_passed', {'true': True, 'false': False}),
+        'boarding': choice_filter('boarding_passed', {'true': True, 'false': False}),
+    },
+    related=['flight__boardflight', 'boardingpass'],
+)
+
 @permission_required('dbapp.view_passenger')
+@conditional_page('dbapp.Passenger', 'dbapp.BoardingPass', 'dbapp.Flight', 'dbapp.Airplane', 'dbapp.Airline')
 def passengers(request: HttpRequest):
-    return render(request, 'passengers.html', {'passengers': Passenger.objects.all()})
+    listing = PASSENGER_LISTING.page(request.GET)
+    passengers = listing['items']
+    versions = row_versions(Passenger, [passenger.pk for passenger in passengers])
+    for passenger in passengers:
+        passenger.row_version = versions[passenger.pk] # type: ignore
+
+    return render(request, 'passengers.html', {'passengers': passengers, 'listing': listing})
+
+PASSENGER_SEARCH_LISTING = Listing(
+    Passenger,
+    sorts={'last_name': 'Фамилия'},
+    default_sort='last_name',
+    filters={
+        'q': prefix_filter('last_name', 'first_name', 'middle_name'),
+        'flight': lambda value: Q(flight_id=int(value)) if value.isdigit() else None,
+    },
+    related=['flight__boardflight'],
+    page_size=20,
+)
+
+@permission_required('dbapp.view_passenger')
+def passenger_search(request: HttpRequest):
+    if not request.GET.get('q', '').strip():
+        return JsonResponse({'results': [], 'next_cursor': None})
+
+    listing = PASSENGER_SEARCH_LISTING.page(request.GET)
+    return JsonResponse({
+        'results': [
+            {
+                'id': passenger.pk,
+                'name': ' '.join(filter(None, [passenger.last_name, passenger.first_name, passenger.middle_name])),
+                'flight': passenger.flight.boardflight.code,
+                'check_in_passed': passenger.check_in_passed,
+                'boarding_passed': passenger.boarding_passed,
+                'url': reverse('passenger_edit', args=[passenger.pk]),
+            }
+            for passenger in listing['items']
+        ],
+        'next_cursor': listing['next_cursor'],
+    })
 
 @transaction.atomic
 @permission_required('dbapp.add_passenger')
@@ -1583,75 +1480,7 @@ def passenger_delete(request: HttpRequest, passenger_id: int):
 
 @permission_required('dbapp.add_passenger')
 def passenger_import(request: HttpRequest):
-    if request.method == 'POST':
-        form = PassengerImportForm(request.POST, request.FILES)
-        if form.is_valid():
-            try:
-                csv_file = form.cleaned_data['csv_file']
-                csv_text = csv_file.read().decode('utf-8-sig')
-                
-                imported_count = 0
-                errors = []
-                
-                with transaction.atomic():
-                    lines = csv_text.strip().split('\n')
-                    headers = [header.strip() for header in lines[0].split(';')]
-                    
-                    for line_num, line in enumerate(lines[1:], start=2):
-                        try:
-                            if not line.strip():
-                                continue
-                                
-                            values = [value.strip() for value in line.split(';')]
-                            if len(values) != len(headers):
-                                errors.append(f"Строка {line_num}: Неверное количество колонок")
-                                continue
-                            
-                            row = dict(zip(headers, values))
-                            
-                            if not all(row.get(field) for field in ['first_name', 'last_name', 'passport', 'flight']):
-                                errors.append(f"Строка {line_num}: Отсутствуют обязательные поля")
-                                continue
-                            
-                            try:
-                                flight_number = int(row['flight'])
-                                flight = Flight.objects.get(number=flight_number)
-                            except (ValueError, Flight.DoesNotExist):
-                                errors.append(f"Строка {line_num}: Рейс '{row['flight']}' не найден")
-                                continue
-                    
-                            Passenger.objects.create(
-                                first_name=row['first_name'],
-                                last_name=row['last_name'],
-                                middle_name=row.get('middle_name', ''),
-                                passport=row['passport'],
-                                flight=flight,
-                                check_in_passed=row.get('check_in_passed', 'False').lower() == 'true',
-                                boarding_passed=row.get('boarding_passed', 'False').lower() == 'true',
-                                is_removed=row.get('is_removed', 'False').lower() == 'true',
-                            )
-                            
-                            imported_count += 1
-                            
-                        except Exception as e:
-                            errors.append(f"Строка {line_num}: {str(e)}")
-                
-                if errors:
-                    messages.error(request, f'Импорт завершен с ошибками. Успешно: {imported_count}')
-                    for error in errors[:5]:
-                        messages.error(request, error)
-                else:
-                    messages.success(request, f'Успешно импортировано {imported_count} пассажиров')
-                    
-                return redirect('passengers')
-                
-            except Exception as e:
-                messages.error(request, f'Ошибка импорта: {str(e)}')
-    else:
-        form = PassengerImportForm()
-    
-    return render(request, 'import_form.html', {
-        'form': form,
+    return import_page(request, PassengerImportForm, 'passenger', {
         'title': 'Импорт пассажиров из CSV',
         'export_url': 'passenger_export',
         'back_url': 'passengers'
@@ -1666,7 +1495,7 @@ def passenger_export(request: HttpRequest):
     writer.writerow(['first_name', 'last_name', 'middle_name', 'passport', 'flight', 
                     'check_in_passed', 'boarding_passed', 'is_removed'])
     
-    passengers = Passenger.objects.select_related('flight').all()
+    passengers = iter_decrypted(Passenger.objects.select_related('flight'), ['passport'], workers=DECRYPT_WORKERS)
     for passenger in passengers:
         writer.writerow([
             passenger.first_name,
@@ -1682,6 +1511,7 @@ def passenger_export(request: HttpRequest):
     return response
 
 @permission_required('dbapp.view_baggage')
+@conditional_page('dbapp.Baggage', 'dbapp.Passenger')
 def baggage(request: HttpRequest, passenger_id: int):
     passenger = get_object_or_404(Passenger, pk=passenger_id)
 
@@ -1832,10 +1662,22 @@ def boarding_pass_edit(request: HttpRequest, passenger_id: int):
         'is_edit': is_edit,
     })
 
+BACKUP_LISTING = Listing(
+    BackupLog,
+    sorts={'created_at': 'Дата создания', 'filename': 'Имя файла', 'file_size': 'Размер'},
+    default_sort='-created_at',
+    filters={
+        'filename': 'filename__icontains',
+        'type': choice_filter('backup_type', {key: key for key, _ in BackupLog.BACKUP_TYPES}),
+        'status': choice_filter('status', {key: key for key, _ in BackupLog.STATUS_CHOICES}),
+    },
+)
+
 @permission_required('dbapp.view_backuplog') 
+@conditional_page('dbapp.BackupLog')
 def backup_list(request: HttpRequest):
-    backups = BackupLog.objects.all()
-    return render(request, 'backup_list.html', {'backups': backups})
+    listing = BACKUP_LISTING.page(request.GET)
+    return render(request, 'backup_list.html', {'backups': listing['items'], 'listing': listing})
 
 @permission_required('dbapp.add_backuplog')
 def create_backup(request: HttpRequest):
@@ -0,0 +1,46 @@
+import copy
+
+from django import forms
+from django.core.exceptions import ValidationError
+from django.urls import reverse
+from django.utils.http import urlencode
+
+from webapp.autocomplete import AUTOCOMPLETES
+
+class AutocompleteSelect(forms.Select):
+    """Select that renders only the chosen option; the rest is loaded from the autocomplete endpoint."""
+
+    def __init__(self, autocomplete: str, attrs=None, params: dict | None = None):
+        super().__init__(attrs)
+        self.autocomplete = autocomplete
+        self.params = params or {}
+
+    def get_context(self, name, value, attrs):
+        context = super().get_context(name, value, attrs)
+        url = reverse('autocomplete', args=[self.autocomplete])
+        if self.params:
+            url = f'{url}?{urlencode(self.params)}'
+        context['widget']['attrs']['data-autocomplete'] = url
+        return context
+
+    def optgroups(self, name, value, attrs=None):
+        field = self.choices.field # type: ignore
+        autocomplete = AUTOCOMPLETES[self.autocomplete]
+        pks = [pk for pk in value if pk not in ('', None)]
+
+        try:
+            selected = list(field.queryset.filter(pk__in=pks)) if pks else []
+        except (ValueError, ValidationError):
+            selected = []
+
+        widget = copy.copy(self)
+        widget.choices = [('', field.empty_label)] if field.empty_label is not None else []
+        widget.choices += [(field.prepare_value(instance), autocomplete.label(instance)) for instance in selected]
+        groups = super(AutocompleteSelect, widget).optgroups(name, value, attrs)
+
+        if autocomplete.data:
+            options = {option['value']: option for _, group, _ in groups for option in group}
+            for instance in selected:
+                option = options[field.prepare_value(instance)]
+                option['attrs'].update({f'data-{key}': value for key, value in autocomplete.data(instance).items()})
+        return groups